@@ -1,40 +1,231 @@
+import asyncio
+from datetime import timedelta
 import logging
+import time
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, PLATFORMS, UPDATE_INTERVAL
+from .cache import EleniaCache
+from .const import (
+    CONF_CHEAPEST_WINDOWS,
+    CONF_CONTIGUOUS,
+    CONF_DEADLINE,
+    CONF_DURATION,
+    CONF_HOURLY_METER,
+    CONF_MAX_JITTER,
+    CONF_RATE_LIMIT,
+    CONF_RATE_LIMIT_BURST,
+    DATA_CHEAPEST_WINDOWS,
+    DATA_MAX_JITTER,
+    DATA_RATE_LIMITER,
+    DEFAULT_MAX_JITTER,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_BURST,
+    DOMAIN,
+    PLATFORMS,
+    STORAGE_VERSION,
+    UPDATE_INTERVAL,
+)
+from .coordinator import (
+    ConsumptionCoordinator,
+    EleniaRuntimeData,
+    HourlyMeterCoordinator,
+    MarketCoordinator,
+)
 from .elenia_data import EleniaData
+from .rate_limit import TokenBucket
+from .request import EleniaCircuitOpenError, EleniaTransientError
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
 SCAN_INTERVAL = UPDATE_INTERVAL
 
+CHEAPEST_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(CONF_DURATION): cv.positive_time_period,
+        vol.Optional(CONF_CONTIGUOUS, default=True): cv.boolean,
+        vol.Optional(CONF_DEADLINE): cv.time,
+    }
+)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.01)
+                ),
+                vol.Optional(
+                    CONF_RATE_LIMIT_BURST, default=DEFAULT_RATE_LIMIT_BURST
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_MAX_JITTER, default=DEFAULT_MAX_JITTER
+                ): cv.positive_time_period,
+                vol.Optional(CONF_CHEAPEST_WINDOWS, default=[]): vol.All(
+                    cv.ensure_list, [CHEAPEST_WINDOW_SCHEMA]
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
 async def async_setup(hass: HomeAssistant, config: dict):
-    hass.data.setdefault(DOMAIN, {})
+    conf = config.get(DOMAIN, {})
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data[DATA_RATE_LIMITER] = TokenBucket(
+        conf.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        conf.get(CONF_RATE_LIMIT_BURST, DEFAULT_RATE_LIMIT_BURST),
+    )
+    domain_data[DATA_MAX_JITTER] = conf.get(CONF_MAX_JITTER, DEFAULT_MAX_JITTER)
+    domain_data[DATA_CHEAPEST_WINDOWS] = conf.get(CONF_CHEAPEST_WINDOWS, [])
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
     return True
 
 
+async def _async_delayed_refresh(coordinator: DataUpdateCoordinator, delay: timedelta):
+    await asyncio.sleep(delay.total_seconds())
+    await coordinator.async_refresh()
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
+    setup_started = time.monotonic()
+    elenia_data = EleniaData(hass, entry.data, _LOGGER)
+    market_coordinator = MarketCoordinator(hass, entry, elenia_data)
     try:
-        elenia_data = EleniaData(hass, entry.data, _LOGGER)
-        hass.data.setdefault(DOMAIN, {})
-        hass.data[DOMAIN][entry.entry_id] = elenia_data
+        consumption_coordinator = ConsumptionCoordinator(
+            hass, entry, elenia_data, market_coordinator
+        )
+        cache = EleniaCache(hass, entry)
+
+        hourly_meter = entry.data.get(CONF_HOURLY_METER, False) is True
+        # legacy meters have no 5-minute readings, so that coordinator is
+        # left without listeners and never polls
+        coordinators = (
+            (market_coordinator,)
+            if hourly_meter
+            else (consumption_coordinator, market_coordinator)
+        )
 
-        await elenia_data.ensure_authenticated()
+        await consumption_coordinator.async_load_readings()
+        restored = await cache.async_restore(elenia_data, market_coordinator)
+        if restored:
+            # start from cached data and refresh in the background, staggered
+            # so entries restored together do not hit Elenia at once
+            consumption_coordinator.data = consumption_coordinator.snapshot()
+            for coordinator in coordinators:
+                entry.async_create_background_task(
+                    hass,
+                    _async_delayed_refresh(coordinator, coordinator.jitter),
+                    f"{coordinator.name} refresh",
+                )
+        else:
+            try:
+                await elenia_data.ensure_authenticated()
+            except (EleniaCircuitOpenError, EleniaTransientError) as e:
+                raise ConfigEntryNotReady(f"Elenia is unavailable: {e}") from e
+            for coordinator in coordinators:
+                await coordinator.async_config_entry_first_refresh()
+            if hourly_meter:
+                consumption_coordinator.data = consumption_coordinator.snapshot()
+
+        for coordinator in coordinators:
+            entry.async_on_unload(
+                coordinator.async_add_listener(cache.async_schedule_save)
+            )
+        if not hourly_meter:
+            entry.async_on_unload(
+                market_coordinator.async_add_listener(
+                    consumption_coordinator.async_handle_market_update
+                )
+            )
+        cache.async_schedule_save()
+        market_coordinator.async_follow_slot_length(market_coordinator.data)
+        market_coordinator.slot_scheduler.async_start()
+
+        hourly_meter_coordinator = None
+        if hourly_meter:
+            # the yearly payload is large, so it is never waited for at setup
+            hourly_meter_coordinator = HourlyMeterCoordinator(hass, entry, elenia_data)
+            await hourly_meter_coordinator.async_load_readings()
+            hourly_meter_coordinator.data = hourly_meter_coordinator.snapshot()
+            entry.async_create_background_task(
+                hass,
+                _async_delayed_refresh(
+                    hourly_meter_coordinator, hourly_meter_coordinator.jitter
+                ),
+                f"{hourly_meter_coordinator.name} refresh",
+            )
+
+        hass.data.setdefault(DOMAIN, {})
+        hass.data[DOMAIN][entry.entry_id] = EleniaRuntimeData(
+            elenia_data,
+            consumption_coordinator,
+            market_coordinator,
+            hourly_meter_coordinator,
+            cache,
+        )
 
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+        _LOGGER.debug(
+            "Elenia set up in %.0f ms (%s)",
+            (time.monotonic() - setup_started) * 1000,
+            "from cache" if restored else "from Elenia",
+        )
         return True
+    except ConfigEntryNotReady:
+        # HA retries the setup later
+        await _async_release_entry(hass, entry, elenia_data, market_coordinator)
+        raise
     except Exception as e:
         _LOGGER.error("Failed to set up Elenia integration: %s", str(e))
+        await _async_release_entry(hass, entry, elenia_data, market_coordinator)
         return False
 
 
+async def _async_release_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    elenia_data: EleniaData,
+    market_coordinator: MarketCoordinator,
+):
+    """Undo a failed setup, releasing the entry's hold on the shared account."""
+    hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    market_coordinator.slot_scheduler.async_stop()
+    await elenia_data.close()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        runtime_data: EleniaRuntimeData = hass.data[DOMAIN].pop(entry.entry_id)
+        runtime_data.market_coordinator.slot_scheduler.async_stop()
+        await runtime_data.async_save()
+        await runtime_data.elenia_data.close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Delete the cache, readings, costs and hourly readings of the entry."""
+    # the keys used by cache.py and the coordinators
+    stores = [
+        Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}{suffix}")
+        for suffix in ("", ".readings", ".cost", ".hourly")
+    ]
+    await asyncio.gather(*(store.async_remove() for store in stores))
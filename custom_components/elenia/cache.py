@@ -0,0 +1,63 @@
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+from .coordinator import MarketCoordinator, MarketCoordinatorData
+from .elenia_data import EleniaData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EleniaCache:
+    """Persists tokens, customer data and the last market data of an entry.
+
+    Setup restores from here so entities come up without waiting for Elenia.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self._elenia_data: EleniaData | None = None
+        self._market_coordinator: MarketCoordinator | None = None
+
+    async def async_restore(
+        self, elenia_data: EleniaData, market_coordinator: MarketCoordinator
+    ) -> bool:
+        """Restore cached state, returning True if entities can start from it."""
+        self._elenia_data = elenia_data
+        self._market_coordinator = market_coordinator
+        cached = await self._store.async_load()
+        if not cached:
+            return False
+        try:
+            elenia_data.restore_cache(cached.get("auth", {}))
+            if cached.get("market"):
+                market_coordinator.data = MarketCoordinatorData.from_dict(
+                    cached["market"]
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning("Ignoring invalid Elenia cache: %s", str(e))
+            return False
+        return (
+            elenia_data.meteringpoint is not None
+            and market_coordinator.data is not None
+        )
+
+    async def async_save(self):
+        """Write the cache now, cancelling a pending delayed save."""
+        if self._elenia_data is not None:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_schedule_save(self):
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        market_data = self._market_coordinator.data
+        return {
+            "auth": self._elenia_data.as_cache(),
+            "market": market_data.as_dict() if market_data else None,
+        }
@@ -6,6 +6,7 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     AUTH_CLIENT_ID,
@@ -14,6 +15,7 @@ from .const import (
     CONF_GSRN,
     CUSTOMER_DATA_URL,
     DOMAIN, CONF_PRICE_SENSOR_FOR_EACH_HOUR, CONF_RELAY_SENSOR_FOR_EACH_HOUR,
+    CONF_FORECAST_SENSORS, CONF_COST_STATISTICS, CONF_HOURLY_METER,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,7 +36,9 @@ class EleniaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             self.credentials = user_input
             self.elenia_api = EleniaAPI(
-                user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
+                async_get_clientsession(self.hass),
+                user_input[CONF_USERNAME],
+                user_input[CONF_PASSWORD],
             )
             try:
                 await self.elenia_api.authenticate()
@@ -66,9 +70,11 @@ class EleniaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_CUSTOMER_ID: customer_id,
                 CONF_GSRN: gsrn,
                 CONF_PRICE_SENSOR_FOR_EACH_HOUR: user_input[CONF_PRICE_SENSOR_FOR_EACH_HOUR],
-                CONF_RELAY_SENSOR_FOR_EACH_HOUR: user_input[CONF_RELAY_SENSOR_FOR_EACH_HOUR]
+                CONF_RELAY_SENSOR_FOR_EACH_HOUR: user_input[CONF_RELAY_SENSOR_FOR_EACH_HOUR],
+                CONF_FORECAST_SENSORS: user_input[CONF_FORECAST_SENSORS],
+                CONF_COST_STATISTICS: user_input[CONF_COST_STATISTICS],
+                CONF_HOURLY_METER: user_input[CONF_HOURLY_METER],
             }
-            await self.elenia_api.close()
             return self.async_create_entry(title="Elenia", data=data)
 
         metering_points = {}
@@ -91,6 +97,9 @@ class EleniaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required("metering_point"): vol.In(metering_points),
                 vol.Required(CONF_PRICE_SENSOR_FOR_EACH_HOUR, default=True): bool,
                 vol.Required(CONF_RELAY_SENSOR_FOR_EACH_HOUR, default=True): bool,
+                vol.Required(CONF_FORECAST_SENSORS, default=True): bool,
+                vol.Required(CONF_COST_STATISTICS, default=False): bool,
+                vol.Required(CONF_HOURLY_METER, default=False): bool,
             }
         )
         return self.async_show_form(
@@ -102,12 +111,12 @@ class EleniaAPI:
     AUTH_URL = AUTH_URL
     CUSTOMER_DATA_URL = CUSTOMER_DATA_URL
 
-    def __init__(self, username, password):
+    def __init__(self, session: aiohttp.ClientSession, username, password):
         """Initialize."""
         self.username = username
         self.password = password
         self.tokens = {}
-        self.session = aiohttp.ClientSession()
+        self.session = session
         self.authenticated = False
 
     async def authenticate(self):
@@ -173,6 +182,3 @@ class EleniaAPI:
         except Exception as e:
             _LOGGER.error("Exception during customer data fetch: %s", str(e))
             raise
-
-    async def close(self):
-        await self.session.close()
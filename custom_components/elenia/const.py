@@ -1,6 +1,9 @@
-from datetime import timedelta
+from datetime import time, timedelta
 
 DOMAIN = "elenia"
+DATA_ACCOUNTS = "accounts"
+DATA_RATE_LIMITER = "rate_limiter"
+DATA_MAX_JITTER = "max_jitter"
 PLATFORMS = ["sensor"]
 AUTH_URL = "https://cognito-idp.eu-west-1.amazonaws.com/"
 API_URL = "https://public.sgp-prod.aws.elenia.fi/api"
@@ -9,8 +12,56 @@ METER_READING_URL = API_URL + "/gen/meter_reading"
 RELAY_CONTROL_URL = API_URL + "/gen/relay_control"
 RELAY_MARKET_URL = API_URL + "/gen/relay_market"
 UPDATE_INTERVAL = timedelta(hours=1)
+CONSUMPTION_UPDATE_INTERVAL = timedelta(minutes=15)
+# how long after local midnight the previous day is re-fetched until complete
+READINGS_LATE_GRACE = timedelta(hours=3)
+# buffered days with missing or estimated slots are re-fetched on their own
+GAP_REFETCH_INTERVAL = timedelta(hours=1)  # doubled after each fruitless try
+GAP_REFETCH_MAX_ATTEMPTS = 6
+GAP_REFETCH_MAX_DAYS = 2  # per refresh
+BACKFILL_MAX_DAYS = 366
+BACKFILL_MAX_PARALLEL_DAYS = 4
+# days of 5-minute readings kept locally for the day_series websocket command
+READINGS_RETENTION_DAYS = 7
+WEBSOCKET_MAX_DAYS = 31
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+# Elenia publishes the next day's relay plan and prices in the evening
+MARKET_PUBLICATION_START = time(17, 0)
+MARKET_PUBLICATION_END = time(23, 0)
+MARKET_RETRY_INTERVAL = timedelta(minutes=30)
+# relay_market is polled this often inside the window until tomorrow is valid
+MARKET_PREFETCH_INTERVAL = timedelta(minutes=10)
+MAX_PARALLEL_REQUESTS = 3
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+REQUEST_TIMEOUT = 10
+# relay_control, relay_market of both relays and up to two years of hourly
+# readings, plus one meter_reading per day of the buffered range and today
+RESPONSE_CACHE_FEEDS = 5
+MAX_RESPONSE_CACHES = RESPONSE_CACHE_FEEDS + READINGS_RETENTION_DAYS + 1
+REQUEST_ATTEMPTS = 3
+BACKOFF_BASE = 2  # seconds, doubled on every retry
+BACKOFF_MAX = 60
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = timedelta(minutes=10)
+# domain-wide limit on Elenia API requests, shared by all entries
+CONF_RATE_LIMIT = "rate_limit"
+CONF_RATE_LIMIT_BURST = "rate_limit_burst"
+CONF_MAX_JITTER = "max_jitter"
+DEFAULT_RATE_LIMIT = 2.0  # requests per second
+DEFAULT_RATE_LIMIT_BURST = 5
+DEFAULT_MAX_JITTER = timedelta(minutes=5)
+# cheapest-window binary sensors configured in configuration.yaml
+CONF_CHEAPEST_WINDOWS = "cheapest_windows"
+CONF_CONTIGUOUS = "contiguous"
+CONF_DEADLINE = "deadline"
+CONF_DURATION = "duration"
+DATA_CHEAPEST_WINDOWS = "cheapest_windows"
 CONF_CUSTOMER_ID = "customer_id"
 CONF_GSRN = "gsrn"
 CONF_PRICE_SENSOR_FOR_EACH_HOUR="price_sensor_for_each_hour"
 CONF_RELAY_SENSOR_FOR_EACH_HOUR="relay_sensor_for_each_hour"
+CONF_FORECAST_SENSORS="forecast_sensors"
+CONF_COST_STATISTICS="cost_statistics"
+CONF_HOURLY_METER="hourly_meter"
 AUTH_CLIENT_ID = "k4s2pnm04536t1bm72bdatqct"
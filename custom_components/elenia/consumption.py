@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from operator import sub
+
+from .readings import MISSING, SLOT_LENGTH, DaySeries, ReadingBuffer
+from .statistics import STATISTIC_ATTRIBUTES, MeasurementAttribute
+
+SLOT_SECONDS = int(SLOT_LENGTH.total_seconds())
+
+
+@dataclass
+class DayDeltas:
+    """Consumption of one local day in kWh, by UTC hour start (epoch seconds)."""
+
+    hourly: dict[MeasurementAttribute, dict[int, float]] = field(default_factory=dict)
+    # counted on the total ("a") series
+    resets: int = 0
+    gaps: int = 0
+
+    def total(self, attribute: MeasurementAttribute) -> float | None:
+        hourly = self.hourly.get(attribute)
+        return round(sum(hourly.values()), 3) if hourly else None
+
+
+def last_reading(series: DaySeries | None, attribute: MeasurementAttribute):
+    """Slot end and value of the last non-null reading, or (None, None)."""
+    if series is None:
+        return None, None
+    values = getattr(series, attribute)
+    for i in range(len(values) - 1, -1, -1):
+        if values[i] != MISSING:
+            return series.t[i], values[i]
+    return None, None
+
+
+def day_deltas(readings: ReadingBuffer, day: date) -> DayDeltas:
+    """Difference the cumulative series of a day into hourly consumption.
+
+    The previous day's last reading is the baseline for the first slot. A
+    reading lower than the one before is a meter reset, and counts from zero.
+    Over a gap the whole difference goes to the hour of the slot that ends it,
+    so the day total stays right.
+    """
+    deltas = DayDeltas()
+    series = readings.days.get(day)
+    if series is None:
+        return deltas
+    previous_series = readings.days.get(day - timedelta(days=1))
+    for attribute in STATISTIC_ATTRIBUTES:
+        pairs = [
+            (t, value)
+            for t, value in zip(series.t, getattr(series, attribute))
+            if value != MISSING
+        ]
+        if not pairs:
+            continue
+        base_t, base_value = last_reading(previous_series, attribute)
+        times = [t for t, _ in pairs]
+        values = [value for _, value in pairs]
+        if base_value is None:
+            # nothing to difference the first slot against
+            base_t, base_value = times[0], values[0]
+        differences = list(map(sub, values, [base_value, *values[:-1]]))
+        steps = list(map(sub, times, [base_t, *times[:-1]]))
+
+        hourly: dict[int, float] = {}
+        resets = gaps = 0
+        for t, value, difference, step in zip(times, values, differences, steps):
+            if difference < 0:
+                resets += 1
+                difference = value
+            if step > SLOT_SECONDS:
+                gaps += 1
+            hour = (t - SLOT_SECONDS) // 3600 * 3600
+            hourly[hour] = hourly.get(hour, 0) + difference
+        if attribute == "a":
+            deltas.resets, deltas.gaps = resets, gaps
+        deltas.hourly[attribute] = {
+            hour: value / 1000 for hour, value in hourly.items()
+        }
+    return deltas
+
+
+class ConsumptionDeltas:
+    """Per-day hourly consumption, recomputed only for days with new slots."""
+
+    def __init__(self):
+        self.days: dict[date, DayDeltas] = {}
+
+    def get(self, day: date) -> DayDeltas | None:
+        return self.days.get(day)
+
+    def update(self, readings: ReadingBuffer, days):
+        # a day's first slot is differenced against the previous day
+        touched = set(days)
+        touched.update(day + timedelta(days=1) for day in list(touched))
+        for day in sorted(touched):
+            if day in readings.days:
+                self.days[day] = day_deltas(readings, day)
+            else:
+                self.days.pop(day, None)
+
+    def prune(self, keep_from: date):
+        for day in [day for day in self.days if day < keep_from]:
+            del self.days[day]
@@ -0,0 +1,553 @@
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_COST_STATISTICS,
+    CONSUMPTION_UPDATE_INTERVAL,
+    DOMAIN,
+    MARKET_PREFETCH_INTERVAL,
+    MARKET_PUBLICATION_END,
+    MARKET_PUBLICATION_START,
+    MARKET_RETRY_INTERVAL,
+    READINGS_LATE_GRACE,
+    READINGS_RETENTION_DAYS,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    UPDATE_INTERVAL,
+)
+from .consumption import ConsumptionDeltas
+from .cost import CostLedger
+from .elenia_data import EleniaData
+from .gaps import GapTracker
+from .hourly import HourlyReadings
+from .request import UNCHANGED
+from .rate_limit import entry_jitter, next_aligned_refresh
+from .readings import ReadingBuffer, local_day_of, to_epoch
+from .scheduler import SlotScheduler
+from .statistics import StatisticsImporter
+from .types import (
+    DaySlots,
+    MarketIndex,
+    MarketSlot,
+    RelayData,
+    RelayMarketDataList,
+    build_market_index,
+    parse_relay,
+)
+
+if TYPE_CHECKING:
+    from .cache import EleniaCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class StateWrites:
+    """Entity state writes done and skipped as unchanged."""
+
+    written: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class MarketCoordinatorData:
+    relay_schedule_data: RelayData | None
+    relay1_market_data: RelayMarketDataList | None
+    relay2_market_data: RelayMarketDataList | None
+    market_index: MarketIndex = field(init=False)
+
+    def __post_init__(self):
+        self.market_index = build_market_index(
+            self.relay1_market_data, self.relay2_market_data
+        )
+
+    def market_slot(self, hour: int | None = None) -> MarketSlot | None:
+        """Return today's slot of the given hour, or the current slot.
+
+        An hour of 15-minute prices is returned as the average of its quarters.
+        """
+        now = dt_util.now()
+        today = self.market_index.get(now.date().isoformat())
+        if today is None:
+            return None
+        if hour is None:
+            return today.at(now.timestamp())
+        return today.at_hour(hour)
+
+    def day_slots(self, day: date) -> DaySlots | None:
+        return self.market_index.get(day.isoformat())
+
+    def slot_minutes(self, day: date) -> int | None:
+        day_slots = self.day_slots(day)
+        return day_slots.slot_minutes if day_slots else None
+
+    def has_day(self, day: date) -> bool:
+        return day.isoformat() in self.market_index
+
+    def is_published(self, day: date) -> bool:
+        """True once the day's market entry is in with status "valid"."""
+        day_slots = self.day_slots(day)
+        return day_slots is not None and day_slots.valid
+
+    def as_dict(self) -> dict:
+        return {
+            "relay_schedule_data": (
+                asdict(self.relay_schedule_data) if self.relay_schedule_data else None
+            ),
+            "relay1_market_data": (
+                asdict(self.relay1_market_data)["data"]
+                if self.relay1_market_data
+                else None
+            ),
+            "relay2_market_data": (
+                asdict(self.relay2_market_data)["data"]
+                if self.relay2_market_data
+                else None
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MarketCoordinatorData":
+        relay_schedule = data.get("relay_schedule_data")
+        relay1_market = data.get("relay1_market_data")
+        relay2_market = data.get("relay2_market_data")
+        return cls(
+            relay_schedule_data=(
+                RelayData(
+                    gsrn=relay_schedule["gsrn"],
+                    serialnumber=relay_schedule["serialnumber"],
+                    relay1=parse_relay(relay_schedule.get("relay1")),
+                    relay2=parse_relay(relay_schedule.get("relay2")),
+                )
+                if relay_schedule
+                else None
+            ),
+            relay1_market_data=(
+                RelayMarketDataList.from_json(relay1_market) if relay1_market else None
+            ),
+            relay2_market_data=(
+                RelayMarketDataList.from_json(relay2_market) if relay2_market else None
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class ConsumptionCoordinatorData:
+    """Snapshot of the reading buffer. Equal snapshots mean nothing changed."""
+
+    version: int
+    cost_version: int
+    readings: ReadingBuffer = field(compare=False)
+    deltas: ConsumptionDeltas = field(compare=False)
+    costs: CostLedger = field(compare=False)
+
+
+class ConsumptionCoordinator(DataUpdateCoordinator[ConsumptionCoordinatorData]):
+    """Polls the 5-minute meter readings into a persisted ReadingBuffer."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        elenia_data: EleniaData,
+        market_coordinator: "MarketCoordinator",
+    ):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Elenia consumption",
+            update_interval=CONSUMPTION_UPDATE_INTERVAL,
+            # listeners are only called when the readings actually changed
+            always_update=False,
+        )
+        self.elenia_data = elenia_data
+        self.jitter = entry_jitter(hass, entry.entry_id)
+        self.state_writes = StateWrites()
+        self.readings = ReadingBuffer()
+        self.deltas = ConsumptionDeltas()
+        self.gaps = GapTracker()
+        self.market_coordinator = market_coordinator
+        self.costs = CostLedger()
+        self.cost_statistics = entry.data.get(CONF_COST_STATISTICS, False)
+        self.statistics = StatisticsImporter(hass, elenia_data.gsrn)
+        self._store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.readings"
+        )
+        self._cost_store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.cost"
+        )
+
+    async def async_load_readings(self):
+        stored = await self._store.async_load()
+        if stored:
+            self.readings = ReadingBuffer.from_dict(stored)
+            self.deltas.update(self.readings, self.readings.days)
+            self.gaps.update(self.readings, self.readings.days)
+        stored_costs = await self._cost_store.async_load()
+        if stored_costs:
+            self.costs = CostLedger.from_dict(stored_costs)
+
+    async def async_save(self):
+        """Write readings and costs now, cancelling pending delayed saves."""
+        await self._store.async_save(self.readings.as_dict())
+        await self._cost_store.async_save(self.costs.as_dict())
+
+    def snapshot(self) -> ConsumptionCoordinatorData:
+        return ConsumptionCoordinatorData(
+            self.readings.version,
+            self.costs.version,
+            self.readings,
+            self.deltas,
+            self.costs,
+        )
+
+    def update_costs(self, revised_from: dict[date, int] | None = None) -> bool:
+        """Price the slots that arrived since the last update."""
+        market_data = self.market_coordinator.data
+        changed_days = self.costs.update(
+            self.readings,
+            market_data.market_index if market_data else None,
+            revised_from,
+        )
+        if not changed_days:
+            return False
+        if self.cost_statistics:
+            # later days' cumulative sums move with an earlier day's total
+            for day in sorted(self.costs.days):
+                if day >= changed_days[0]:
+                    self.statistics.import_costs(self.costs.hourly_sums(day))
+        self._cost_store.async_delay_save(self.costs.as_dict, STORAGE_SAVE_DELAY)
+        return True
+
+    @callback
+    def async_handle_market_update(self):
+        """Re-price consumption once new or revised prices come in."""
+        if self.data is not None and self.update_costs():
+            self.data = self.snapshot()
+            self.async_update_listeners()
+
+    async def _async_update_data(self) -> ConsumptionCoordinatorData:
+        # refresh at a stable per-entry offset so entries do not fire together
+        self.update_interval = next_aligned_refresh(
+            CONSUMPTION_UPDATE_INTERVAL, self.jitter
+        )
+        now = dt_util.now()
+        today = now.date()
+        yesterday = today - timedelta(days=1)
+        days = [today]
+        if (
+            now - dt_util.start_of_local_day(today) < READINGS_LATE_GRACE
+            and not self.readings.is_complete(yesterday)
+        ):
+            days.insert(0, yesterday)
+
+        changed = []
+        fetched = False
+        for day in days:
+            measurements = await self.elenia_data.fetch_5min_readings(
+                day, conditional=True
+            )
+            if measurements is None:
+                continue
+            fetched = True
+            if measurements is not UNCHANGED:
+                changed.extend(self.readings.merge(measurements))
+        if not fetched:
+            raise UpdateFailed("Failed to fetch consumption data")
+        changed.extend(await self._refetch_gaps(now, days))
+
+        _LOGGER.debug("Merged %s new or changed 5-minute slots", len(changed))
+        self.statistics.import_changed(changed, self.readings)
+        changed_days = {local_day_of(measurement["dt"]) for measurement in changed}
+        self.deltas.update(self.readings, changed_days)
+        # yesterday's trailing slots only count as missing once today starts
+        self.gaps.update(self.readings, changed_days | {yesterday})
+        revised_from: dict[date, int] = {}
+        for measurement in changed:
+            day = local_day_of(measurement["dt"])
+            t = to_epoch(measurement["dt"])
+            revised_from[day] = min(revised_from.get(day, t), t)
+        self.update_costs(revised_from)
+        keep_from = today - timedelta(days=READINGS_RETENTION_DAYS)
+        self.readings.prune(keep_from)
+        self.deltas.prune(keep_from)
+        self.gaps.prune(keep_from)
+        self.costs.prune(keep_from, today)
+        if changed:
+            self._store.async_delay_save(self.readings.as_dict, STORAGE_SAVE_DELAY)
+        return self.snapshot()
+
+    async def _refetch_gaps(self, now: datetime, fetched_days) -> list:
+        """Re-fetch a few older days that still have missing or estimated slots.
+
+        At most GAP_REFETCH_MAX_DAYS days are fetched, in parallel. Revised
+        slots come back through the normal merge, so statistics, consumption
+        and cost are updated for them like for new slots.
+        """
+        due = self.gaps.due(now, fetched_days)
+        if not due:
+            return []
+        changed = []
+        # one failing day must not drop the readings of the others
+        results = await asyncio.gather(
+            *(
+                self.elenia_data.fetch_5min_readings(day, conditional=True)
+                for day in due
+            ),
+            return_exceptions=True,
+        )
+        for day, measurements in zip(due, results):
+            self.gaps.record_attempt(day, now)
+            if isinstance(measurements, BaseException):
+                _LOGGER.warning("Failed to re-fetch %s: %s", day, measurements)
+            elif measurements is not None and measurements is not UNCHANGED:
+                changed.extend(self.readings.merge(measurements))
+        _LOGGER.debug("Re-fetched %s for missing or estimated slots", due)
+        return changed
+
+
+@dataclass(frozen=True)
+class HourlyMeterCoordinatorData:
+    """Snapshot of a legacy meter's hourly readings."""
+
+    version: int
+    readings: HourlyReadings = field(compare=False)
+
+
+class HourlyMeterCoordinator(DataUpdateCoordinator[HourlyMeterCoordinatorData]):
+    """Polls the yearly hourly readings of a legacy metering point.
+
+    The payload is requested conditionally and only the latest month is
+    converted again, so a refresh costs little once the year is loaded.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, elenia_data: EleniaData
+    ):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Elenia hourly meter",
+            update_interval=UPDATE_INTERVAL,
+            always_update=False,
+        )
+        self.elenia_data = elenia_data
+        self.jitter = entry_jitter(hass, entry.entry_id)
+        self.state_writes = StateWrites()
+        self.readings = HourlyReadings()
+        self.statistics = StatisticsImporter(hass, elenia_data.gsrn)
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.hourly")
+
+    async def async_load_readings(self):
+        stored = await self._store.async_load()
+        if stored:
+            self.readings = HourlyReadings.from_dict(stored)
+
+    async def async_save(self):
+        """Write the readings now, cancelling a pending delayed save."""
+        await self._store.async_save(self.readings.as_dict())
+
+    def snapshot(self) -> HourlyMeterCoordinatorData:
+        return HourlyMeterCoordinatorData(self.readings.version, self.readings)
+
+    async def _async_update_data(self) -> HourlyMeterCoordinatorData:
+        self.update_interval = next_aligned_refresh(UPDATE_INTERVAL, self.jitter)
+        year = dt_util.now().year
+        years = [year]
+        if self.readings.year is not None and self.readings.year < year:
+            # finish last year's final hours before switching over
+            years.insert(0, self.readings.year)
+
+        for fetch_year in years:
+            body = await self.elenia_data.fetch_meter_readings(fetch_year)
+            if body is None:
+                raise UpdateFailed("Failed to fetch hourly meter readings")
+            if body is UNCHANGED:
+                continue
+            try:
+                changed = self.readings.merge(fetch_year, body)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                self.elenia_data.response_cache(
+                    f"meter_reading_hourly_{fetch_year}"
+                ).invalidate()
+                raise UpdateFailed(f"Invalid hourly meter readings: {e}") from e
+            _LOGGER.debug("Hourly readings changed for months %s", changed)
+            for month in changed:
+                self.statistics.import_hourly_sums(
+                    "a", self.readings.hourly_sums(month)
+                )
+            if changed:
+                self._store.async_delay_save(
+                    self.readings.as_dict, STORAGE_SAVE_DELAY
+                )
+        return self.snapshot()
+
+
+class MarketCoordinator(DataUpdateCoordinator[MarketCoordinatorData]):
+    """Polls the relay schedule and relay market feeds.
+
+    These change once a day, so the coordinator sleeps until the evening
+    publication window. Inside it only relay_market is polled, every
+    MARKET_PREFETCH_INTERVAL, until tomorrow's entry is valid. Tomorrow is
+    then already cached at midnight and the rollover only switches days.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, elenia_data: EleniaData
+    ):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Elenia market",
+            update_interval=MARKET_RETRY_INTERVAL,
+            always_update=False,
+        )
+        self.elenia_data = elenia_data
+        self.jitter = entry_jitter(hass, entry.entry_id)
+        self.state_writes = StateWrites()
+        self.slot_scheduler = SlotScheduler(hass)
+        self.slot_scheduler.async_add_listener(self._handle_day_rollover, day_only=True)
+        self._schedule_fetched_at: datetime | None = None
+
+    async def _async_update_data(self) -> MarketCoordinatorData:
+        try:
+            data = await self._fetch_market_data(self._should_fetch_schedule())
+        except UpdateFailed:
+            self.update_interval = MARKET_RETRY_INTERVAL
+            raise
+        self.update_interval = self._resolve_next_refresh(data)
+        _LOGGER.debug("Next market data refresh in %s", self.update_interval)
+        self.async_follow_slot_length(data)
+        return data
+
+    def _should_fetch_schedule(self) -> bool:
+        """The relay schedule is configuration, so prefetch polls skip it."""
+        return (
+            self.data is None
+            or self._schedule_fetched_at is None
+            or dt_util.utcnow() - self._schedule_fetched_at >= UPDATE_INTERVAL
+        )
+
+    @callback
+    def _handle_day_rollover(self):
+        if self.data is None:
+            return
+        self.async_follow_slot_length(self.data)
+        if not self.data.has_day(dt_util.now().date()):
+            # the prefetch missed the publication, so fetch today right away
+            _LOGGER.debug("No market data for the new day, refreshing")
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_follow_slot_length(self, data: MarketCoordinatorData):
+        """Push states at 15-minute boundaries when today's slots are that short."""
+        slot_minutes = data.slot_minutes(dt_util.now().date())
+        if slot_minutes:
+            self.slot_scheduler.set_slot_minutes(slot_minutes)
+
+    async def _fetch_market_data(
+        self, fetch_schedule: bool = True
+    ) -> MarketCoordinatorData:
+        try:
+            await self.elenia_data.fetch_customer_data_and_token()
+        except Exception as e:
+            raise UpdateFailed(f"Failed to fetch customer token: {e}") from e
+
+        requests = {
+            "relay1_market_data": self.elenia_data.fetch_relay_market(1),
+            "relay2_market_data": self.elenia_data.fetch_relay_market(2),
+        }
+        if fetch_schedule:
+            requests["relay_schedule_data"] = self.elenia_data.fetch_relay_schedule()
+        # bounded by the account's request semaphore
+        results = await asyncio.gather(*requests.values(), return_exceptions=True)
+        schedule = results[-1]
+        if fetch_schedule and schedule is not None and not isinstance(
+            schedule, BaseException
+        ):
+            # a failed schedule is fetched again on the next refresh
+            self._schedule_fetched_at = dt_util.utcnow()
+        feeds = list(requests)
+        values = {
+            "relay_schedule_data": self.data.relay_schedule_data if self.data else None
+        }
+        failed = []
+        unchanged = []
+        for feed, result in zip(feeds, results):
+            if result is None or isinstance(result, BaseException):
+                failed.append(feed)
+                # keep the last good value for this slice
+                values[feed] = getattr(self.data, feed) if self.data else None
+            elif result is UNCHANGED:
+                unchanged.append(feed)
+                values[feed] = getattr(self.data, feed) if self.data else None
+            else:
+                values[feed] = result
+
+        if len(failed) == len(feeds):
+            raise UpdateFailed("Failed to fetch any market data")
+        if failed:
+            _LOGGER.warning(
+                "Failed to fetch %s, keeping previous values", ", ".join(failed)
+            )
+        if self.data is not None and len(failed) + len(unchanged) == len(feeds):
+            # same object, so always_update=False skips the listeners
+            _LOGGER.debug("Market data unchanged")
+            return self.data
+
+        return MarketCoordinatorData(**values)
+
+    def _resolve_next_refresh(self, data: MarketCoordinatorData) -> timedelta:
+        now = dt_util.now()
+        today = now.date()
+        window_start = _local_datetime(today, MARKET_PUBLICATION_START)
+        window_end = _local_datetime(today, MARKET_PUBLICATION_END)
+
+        if data.is_published(today + timedelta(days=1)):
+            next_window_start = _local_datetime(
+                today + timedelta(days=1), MARKET_PUBLICATION_START
+            )
+            return next_window_start + self.jitter - now
+        if not data.has_day(today):
+            return MARKET_RETRY_INTERVAL
+        if now < window_start:
+            return window_start + self.jitter - now
+        if now < window_end:
+            return MARKET_PREFETCH_INTERVAL
+        return UPDATE_INTERVAL
+
+
+def _local_datetime(day: date, at: time) -> datetime:
+    return datetime.combine(day, at, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+@dataclass
+class EleniaRuntimeData:
+    elenia_data: EleniaData
+    consumption_coordinator: ConsumptionCoordinator
+    market_coordinator: MarketCoordinator
+    hourly_meter_coordinator: HourlyMeterCoordinator | None = None
+    cache: "EleniaCache | None" = None
+
+    async def async_save(self):
+        """Write everything the entry stores, instead of after a delay.
+
+        Done on unload, so no delayed save writes a removed entry's files back.
+        """
+        await self.consumption_coordinator.async_save()
+        if self.hourly_meter_coordinator is not None:
+            await self.hourly_meter_coordinator.async_save()
+        if self.cache is not None:
+            await self.cache.async_save()
@@ -0,0 +1,193 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+
+from .consumption import SLOT_SECONDS, last_reading
+from .readings import MISSING, ReadingBuffer
+from .types import DaySlots, MarketIndex, MarketSlot
+
+
+def price_key(day_slots: DaySlots) -> tuple:
+    """The prices a day's cost depends on. A change means recomputing it."""
+    return tuple(slot.total for slot in day_slots.slots)
+
+
+def slot_price(market_index: MarketIndex, slot_end: int) -> MarketSlot | None:
+    start = slot_end - SLOT_SECONDS
+    day = dt_util.as_local(datetime.fromtimestamp(start, timezone.utc)).date()
+    day_slots = market_index.get(day.isoformat())
+    return day_slots.at(start) if day_slots else None
+
+
+@dataclass
+class DayCost:
+    """Running cost of one local day in euros, by UTC hour start (epoch)."""
+
+    price_key: tuple
+    hourly: dict[int, float] = field(default_factory=dict)
+    total: float = 0.0
+    # the last slot joined with a price, and its cumulative reading
+    last_t: int | None = None
+    last_value: int | None = None
+    unpriced_slots: int = 0
+
+
+class CostLedger:
+    """Joins 5-minute consumption with the total price of the market slot.
+
+    Each day keeps the last slot it processed, so a refresh only prices the
+    slots after it. A day is recomputed from scratch only when an older slot
+    is revised or its prices change. Day totals outlive the reading buffer
+    for month-to-date, and each day's starting cumulative sum is kept for
+    the cost statistics.
+    """
+
+    def __init__(self):
+        self.days: dict[date, DayCost] = {}
+        self.totals: dict[date, float] = {}
+        self.start_sums: dict[date, float] = {}
+        self.version = 0
+
+    def update(
+        self,
+        readings: ReadingBuffer,
+        market_index: MarketIndex | None,
+        revised_from: dict[date, int] | None = None,
+    ) -> list[date]:
+        """Price new slots of the buffered days, returning the days that changed.
+
+        revised_from maps a day to the earliest slot end that was revised.
+        """
+        revised_from = revised_from or {}
+        market_index = market_index or {}
+        changed = []
+        for day in sorted(readings.days):
+            day_slots = market_index.get(day.isoformat())
+            if not day_slots:
+                # keep the stored total until the day's prices are known
+                continue
+            series = readings.days[day]
+            key = price_key(day_slots)
+            cost = self.days.get(day)
+            revised = day in revised_from and (
+                cost is None
+                or cost.last_t is None
+                or revised_from[day] <= cost.last_t
+            )
+            if cost is None or revised or cost.price_key != key:
+                cost = DayCost(key)
+                cost.last_t, cost.last_value = last_reading(
+                    readings.days.get(day - timedelta(days=1)), "a"
+                )
+                self.days[day] = cost
+            elif cost.last_t is not None and series.t[-1] <= cost.last_t:
+                # no new slots
+                continue
+
+            previous_total = self.totals.get(day)
+            self._price_slots(cost, series, market_index)
+            if cost.hourly or previous_total is not None:
+                self.totals[day] = round(cost.total, 6)
+            if self.totals.get(day) != previous_total:
+                changed.append(day)
+
+        if changed:
+            self._update_start_sums(min(changed))
+            self.version += 1
+        return changed
+
+    def _price_slots(self, cost: DayCost, series, market_index: MarketIndex):
+        start = 0 if cost.last_t is None else bisect_right(series.t, cost.last_t)
+        values = series.a
+        for i in range(start, len(series.t)):
+            value = values[i]
+            if value == MISSING:
+                continue
+            t = series.t[i]
+            if cost.last_value is None:
+                cost.last_t, cost.last_value = t, value
+                continue
+            difference = value - cost.last_value
+            if difference < 0:
+                # meter reset
+                difference = value
+            slot = slot_price(market_index, t)
+            if slot is None:
+                cost.unpriced_slots += 1
+            else:
+                # Wh * c/kWh -> euros
+                slot_cost = difference * slot.total / 100_000
+                hour = (t - SLOT_SECONDS) // 3600 * 3600
+                cost.hourly[hour] = cost.hourly.get(hour, 0.0) + slot_cost
+                cost.total += slot_cost
+            cost.last_t, cost.last_value = t, value
+
+    def _update_start_sums(self, from_day: date):
+        """Carry the cumulative sum forward from the first changed day."""
+        days = sorted(self.totals)
+        self.start_sums.setdefault(days[0], 0.0)
+        for previous, day in zip(days, days[1:]):
+            if day >= from_day:
+                previous_sum = self.start_sums.get(previous, 0.0)
+                self.start_sums[day] = previous_sum + self.totals[previous]
+
+    def total(self, day: date) -> float | None:
+        total = self.totals.get(day)
+        return round(total, 2) if total is not None else None
+
+    def month_to_date(self, today: date) -> float:
+        return round(
+            sum(
+                total
+                for day, total in self.totals.items()
+                if (day.year, day.month) == (today.year, today.month)
+                and day <= today
+            ),
+            2,
+        )
+
+    def hourly_sums(self, day: date) -> list[tuple[datetime, float, float]]:
+        """(hour start, cost, cumulative sum) of a day, for statistics."""
+        cost = self.days.get(day)
+        if cost is None:
+            return []
+        running = self.start_sums.get(day, 0.0)
+        sums = []
+        for hour in sorted(cost.hourly):
+            running += cost.hourly[hour]
+            start = datetime.fromtimestamp(hour, timezone.utc)
+            sums.append((start, cost.hourly[hour], running))
+        return sums
+
+    def prune(self, keep_from: date, today: date):
+        """Drop joined days outside the buffer; keep totals for this month and last."""
+        for day in [day for day in self.days if day < keep_from]:
+            del self.days[day]
+        month_start = today.replace(day=1)
+        previous_month_start = (month_start - timedelta(days=1)).replace(day=1)
+        for day in [day for day in self.totals if day < previous_month_start]:
+            del self.totals[day]
+            self.start_sums.pop(day, None)
+
+    def as_dict(self) -> dict:
+        return {
+            "totals": {day.isoformat(): total for day, total in self.totals.items()},
+            "start_sums": {
+                day.isoformat(): start_sum for day, start_sum in self.start_sums.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CostLedger":
+        ledger = cls()
+        ledger.totals = {
+            date.fromisoformat(day): total
+            for day, total in data.get("totals", {}).items()
+        }
+        ledger.start_sums = {
+            date.fromisoformat(day): start_sum
+            for day, start_sum in data.get("start_sums", {}).items()
+        }
+        return ledger
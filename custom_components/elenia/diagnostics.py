@@ -0,0 +1,45 @@
+from dataclasses import asdict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_RATE_LIMITER, DOMAIN
+from .coordinator import EleniaRuntimeData
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    runtime_data: EleniaRuntimeData = hass.data[DOMAIN][entry.entry_id]
+    rate_limiter = hass.data[DOMAIN].get(DATA_RATE_LIMITER)
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "rate_limiter": rate_limiter.as_dict() if rate_limiter else None,
+        "circuit_breakers": {
+            name: breaker.as_dict()
+            for name, breaker in runtime_data.elenia_data.account.breakers.items()
+        },
+        "response_caches": {
+            key: response_cache.as_dict()
+            for key, response_cache in runtime_data.elenia_data.response_caches.items()
+        },
+        "reading_gaps": runtime_data.consumption_coordinator.gaps.as_dict(),
+        "coordinators": {
+            coordinator.name: {
+                "last_update_success": coordinator.last_update_success,
+                "update_interval": str(coordinator.update_interval),
+                "jitter": str(coordinator.jitter),
+                "state_writes": asdict(coordinator.state_writes),
+            }
+            for coordinator in (
+                runtime_data.consumption_coordinator,
+                runtime_data.market_coordinator,
+                runtime_data.hourly_meter_coordinator,
+            )
+            if coordinator is not None
+        },
+    }
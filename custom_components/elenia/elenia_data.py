@@ -1,13 +1,16 @@
-from datetime import datetime, timedelta
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+import json
 from logging import Logger
-from typing import Literal
+from typing import Awaitable, Callable, Literal
 
-import aiohttp
-import async_timeout
 from pydantic import ValidationError
 
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.util import dt as dt_util
 
 from .const import (
@@ -16,133 +19,175 @@ from .const import (
     CONF_CUSTOMER_ID,
     CONF_GSRN,
     CUSTOMER_DATA_URL,
+    DATA_ACCOUNTS,
+    DOMAIN,
+    MAX_PARALLEL_REQUESTS,
+    MAX_RESPONSE_CACHES,
     METER_READING_URL,
     RELAY_CONTROL_URL,
     RELAY_MARKET_URL,
-    UPDATE_INTERVAL,
+    TOKEN_EXPIRY_MARGIN,
+)
+from .rate_limit import async_get_rate_limiter
+from .request import (
+    UNCHANGED,
+    CircuitBreaker,
+    EleniaAuthError,
+    EleniaPermanentError,
+    EleniaRequestError,
+    ResponseCache,
+    request_json,
 )
 from .types import Measurements, RelayData, RelayMarketDataList, parse_relay
 
 
-class EleniaData:
-    """Class to manage fetching data from Elenia API."""
+def jwt_expiration(token: str | None) -> datetime | None:
+    """Read the exp claim of a JWT as naive UTC. The signature is not checked."""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        padded = payload + "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.utcfromtimestamp(int(claims["exp"]))
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
 
-    def __init__(self, hass: HomeAssistant, config, logger: Logger):
-        """Initialize the data object."""
+
+class SingleFlight:
+    """Shares one in-flight call between all concurrent callers."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def run(self, factory: Callable[[], Awaitable]):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(factory())
+        # a cancelled waiter must not cancel the call the others wait for
+        return await asyncio.shield(self._task)
+
+
+class EleniaAccount:
+    """Tokens, customer data and request slots of one Elenia login.
+
+    Shared by every config entry of the same username, so adding metering
+    points does not add logins or customer_data downloads.
+    """
+
+    def __init__(self, hass: HomeAssistant, username, password, logger: Logger):
+        """Initialize the account."""
         self.hass = hass
-        self.username = config[CONF_USERNAME]
-        self.password = config[CONF_PASSWORD]
-        self.customer_id = config[CONF_CUSTOMER_ID]
-        self.gsrn = config[CONF_GSRN]
-        self.session = aiohttp.ClientSession()
+        self.username = username
+        self.password = password
+        # shared, pooled session owned by Home Assistant; never closed here
+        self.session = async_get_clientsession(hass)
         self.tokens = {}
         self.authenticated = False
         self.token_expiration = datetime.utcnow()
         self.customer_token = None  # The token from customer_data_and_token
         self.customer_token_expiry = datetime.utcnow()
+        self.customer_data = None  # customer_datas of every metering point
         self.logger = logger
-        self.customer_data = None  # set from customer_data
-        self.meteringpoint = None  # set from customer_data
-        self.serialnumber = None  # set from customer_data
+        self.semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+        self.rate_limiter = async_get_rate_limiter(hass)
+        self.users = 0
+        self._token_refresh = SingleFlight()
+        self._customer_data_fetch = SingleFlight()
+        self._readings_fetches: dict[tuple, SingleFlight] = {}
+        self.breakers: dict[str, CircuitBreaker] = {}
 
-    async def authenticate(self):
-        """Authenticate with AWS Cognito and store tokens."""
+    @asynccontextmanager
+    async def request_slot(self):
+        """Hold one of the account's parallel slots and a domain-wide token."""
+        async with self.semaphore:
+            waited = await self.rate_limiter.acquire()
+            if waited > 1:
+                self.logger.debug("Waited %.1f s for the Elenia rate limit", waited)
+            yield
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name)
+        return self.breakers[name]
+
+    async def _cognito(self, auth_flow: str, auth_parameters: dict) -> dict:
         payload = {
-            "AuthFlow": "USER_PASSWORD_AUTH",
+            "AuthFlow": auth_flow,
             "ClientId": AUTH_CLIENT_ID,
-            "AuthParameters": {
-                "USERNAME": self.username,
-                "PASSWORD": self.password,
-            },
+            "AuthParameters": auth_parameters,
             "ClientMetadata": {},
         }
         headers = {
             "Content-Type": "application/x-amz-json-1.1",
             "X-Amz-Target": "AWSCognitoIdentityProviderService.InitiateAuth",
         }
+        data = await request_json(
+            self.session,
+            "POST",
+            AUTH_URL,
+            breaker=self.breaker("cognito"),
+            logger=self.logger,
+            json=payload,
+            headers=headers,
+        )
+        return data["AuthenticationResult"]
+
+    async def authenticate(self):
+        """Authenticate with AWS Cognito and store tokens."""
         try:
-            async with async_timeout.timeout(10):
-                async with self.session.post(
-                    AUTH_URL, json=payload, headers=headers
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json(content_type=None)
-                        auth_result = data["AuthenticationResult"]
-                        self.tokens = {
-                            "AccessToken": auth_result["AccessToken"],
-                            "IdToken": auth_result["IdToken"],
-                            "RefreshToken": auth_result.get("RefreshToken"),
-                        }
-                        expires_in = auth_result["ExpiresIn"]
-                        self.token_expiration = await self.resolve_expiration_time(
-                            expires_in
-                        )
-                        self.authenticated = True
-                        self.logger.debug("Authentication successful")
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Authentication failed: %s - %s", resp.status, error_text
-                        )
-                        raise Exception("Authentication failed")
-        except Exception as e:
+            auth_result = await self._cognito(
+                "USER_PASSWORD_AUTH",
+                {"USERNAME": self.username, "PASSWORD": self.password},
+            )
+        except (EleniaRequestError, KeyError) as e:
             self.logger.error("Exception during authentication: %s", str(e))
             raise
+        self.tokens = {
+            "AccessToken": auth_result["AccessToken"],
+            "IdToken": auth_result["IdToken"],
+            "RefreshToken": auth_result.get("RefreshToken"),
+        }
+        self.token_expiration = await self.resolve_expiration_time(
+            auth_result["ExpiresIn"], auth_result["IdToken"]
+        )
+        self.authenticated = True
+        self.logger.debug("Authentication successful")
 
     async def refresh_token(self):
-        """Refresh the tokens using the REFRESH_TOKEN_AUTH flow."""
+        """Refresh the tokens using the REFRESH_TOKEN_AUTH flow.
+
+        Only a rejected refresh token falls back to a password login; transient
+        failures are raised so an outage does not turn into repeated logins.
+        """
         if not self.tokens.get("RefreshToken"):
             self.logger.debug("No refresh token available to refresh tokens")
             await self.authenticate()
             return
 
-        payload = {
-            "AuthFlow": "REFRESH_TOKEN_AUTH",
-            "ClientId": AUTH_CLIENT_ID,
-            "AuthParameters": {
-                "REFRESH_TOKEN": self.tokens["RefreshToken"],
-            },
-            "ClientMetadata": {},
-        }
-        headers = {
-            "Content-Type": "application/x-amz-json-1.1",
-            "X-Amz-Target": "AWSCognitoIdentityProviderService.InitiateAuth",
-        }
         try:
-            async with async_timeout.timeout(10):
-                async with self.session.post(
-                    AUTH_URL, json=payload, headers=headers
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json(content_type=None)
-                        auth_result = data["AuthenticationResult"]
-                        self.tokens["AccessToken"] = auth_result["AccessToken"]
-                        self.tokens["IdToken"] = auth_result["IdToken"]
-
-                        expires_in = auth_result["ExpiresIn"]
-                        self.token_expiration = await self.resolve_expiration_time(
-                            expires_in
-                        )
-                        self.authenticated = True
-                        self.logger.debug("Token refresh successful")
-                    else:
-                        error_text = await resp.text()
-                        self.logger.debug(
-                            "Token refresh failed: %s - %s", resp.status, error_text
-                        )
-                        # If refresh fails, re-authenticate
-                        await self.authenticate()
-        except Exception as e:
-            self.logger.debug(
-                "Exception during token refresh, retrying authentication: %s", str(e)
+            auth_result = await self._cognito(
+                "REFRESH_TOKEN_AUTH", {"REFRESH_TOKEN": self.tokens["RefreshToken"]}
             )
-            # If an exception occurs, re-authenticate
+        except EleniaAuthError as e:
+            self.logger.debug("Refresh token rejected, re-authenticating: %s", str(e))
             await self.authenticate()
+            return
+        self.tokens["AccessToken"] = auth_result["AccessToken"]
+        self.tokens["IdToken"] = auth_result["IdToken"]
+        self.token_expiration = await self.resolve_expiration_time(
+            auth_result["ExpiresIn"], auth_result["IdToken"]
+        )
+        self.authenticated = True
+        self.logger.debug("Token refresh successful")
 
-    async def resolve_expiration_time(self, expires_in):
-        expiration = datetime.utcnow() + timedelta(seconds=expires_in) - UPDATE_INTERVAL
+    async def resolve_expiration_time(self, expires_in, token: str | None = None):
+        """Expiry from the JWT exp claim, falling back to ExpiresIn."""
+        expires_at = jwt_expiration(token) or datetime.utcnow() + timedelta(
+            seconds=expires_in
+        )
+        expiration = expires_at - TOKEN_EXPIRY_MARGIN
         self.logger.debug(
-            "Original expiration: %s, Expiration set to %s", expires_in, expiration
+            "Original expiration: %s, Expiration set to %s", expires_at, expiration
         )
         return expiration
 
@@ -150,7 +195,8 @@ class EleniaData:
         """Ensure the session is authenticated and tokens are valid."""
         if not self.authenticated or datetime.utcnow() >= self.token_expiration:
             self.logger.debug("Tokens expired or not authenticated, refreshing tokens")
-            await self.refresh_token()
+            # concurrent callers wait for the same refresh
+            await self._token_refresh.run(self.refresh_token)
 
     async def fetch_customer_data_and_token(self):
         """Fetch customer data and get the token for meter readings."""
@@ -158,210 +204,389 @@ class EleniaData:
             self.logger.debug("Using cached customer token")
             return  # Token is still valid
 
-        await self.ensure_authenticated()
-        headers = {"Authorization": f"Bearer {self.tokens.get('IdToken')}"}
+        return await self._customer_data_fetch.run(self._fetch_customer_data_and_token)
+
+    async def _fetch_customer_data_and_token(self):
         try:
-            async with async_timeout.timeout(10):
-                async with self.session.get(CUSTOMER_DATA_URL, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        self.customer_token = data.get("token")
-                        if not self.customer_token:
-                            self.logger.error("No token found in customer data")
-                            raise Exception("No token in customer data")
-                        # Set customer token expiry time to 2 hours 55 minutes from now
-                        self.customer_token_expiry = datetime.utcnow() + timedelta(
-                            hours=2, minutes=55
-                        )
-                        # Store the customer data
-                        self.customer_data = data.get("customer_datas", {})
-
-                        meteringpoints = self.customer_data.get(
-                            self.customer_id, {}
-                        ).get("meteringpoints", [])
-
-                        self.meteringpoint = next(
-                            (
-                                mp
-                                for mp in meteringpoints
-                                if mp.get("gsrn") == self.gsrn
-                            ),
-                            None,
-                        )
-                        self.serialnumber = self.meteringpoint.get(
-                            "device_serialnumber"
-                        )
-                        self.logger.debug("Fetched new customer token")
-                        return data
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Failed to fetch customer data: %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        raise Exception("Failed to fetch customer data")
-        except Exception as e:
+            data = await self.request(
+                CUSTOMER_DATA_URL, endpoint="customer_data", token="id"
+            )
+        except EleniaRequestError as e:
             self.logger.error("Exception during customer data fetch: %s", str(e))
             raise
+        customer_token = data.get("token") if isinstance(data, dict) else None
+        if not customer_token:
+            self.logger.error("No token found in customer data")
+            raise EleniaPermanentError("No token in customer data")
+        self.customer_token = customer_token
+        # Elenia's customer token has lived 3 hours, use that if it cannot
+        # be decoded
+        self.customer_token_expiry = (
+            jwt_expiration(self.customer_token)
+            or datetime.utcnow() + timedelta(hours=3)
+        ) - TOKEN_EXPIRY_MARGIN
+        # Store the customer data, shared by all metering points
+        self.customer_data = data.get("customer_datas", {})
+        self.logger.debug("Fetched new customer token")
+        return data
 
-    async def fetch_relay_schedule(self) -> RelayData | None:
-        headers = {"Authorization": f"Bearer {self.customer_token}"}
+    async def request(
+        self,
+        url: str,
+        *,
+        endpoint: str,
+        token: Literal["id", "customer"] = "customer",
+        params: dict | None = None,
+        response_cache: ResponseCache | None = None,
+        raw: bool = False,
+    ):
+        """GET an Elenia API endpoint with retries and a per-endpoint breaker.
 
-        params = {"gsrn": self.gsrn, "serialnumber": self.serialnumber}
+        A rejected token is renewed once and the request retried. With a
+        response_cache, UNCHANGED is returned when the payload has not changed.
+        With raw, the undecoded body is returned.
+        """
+        for renewed in (False, True):
+            if token == "id":
+                await self.ensure_authenticated()
+                bearer = self.tokens.get("IdToken")
+            else:
+                await self.fetch_customer_data_and_token()
+                bearer = self.customer_token
+            try:
+                return await request_json(
+                    self.session,
+                    "GET",
+                    url,
+                    breaker=self.breaker(endpoint),
+                    logger=self.logger,
+                    slot=self.request_slot,
+                    headers={"Authorization": f"Bearer {bearer}"},
+                    params=params,
+                    response_cache=response_cache,
+                    raw=raw,
+                )
+            except EleniaAuthError:
+                if renewed:
+                    raise
+                self.logger.debug("Token rejected by %s, renewing it", endpoint)
+                if token == "id":
+                    self.authenticated = False
+                else:
+                    self.customer_token = None
 
-        url = RELAY_CONTROL_URL
-        try:
-            async with async_timeout.timeout(10):
-                async with self.session.get(
-                    url, headers=headers, params=params
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if (
-                            data is None
-                            or not isinstance(data, dict)
-                            or not isinstance(data.get("relay1"), dict)
-                        ):
-                            self.logger.error("Invalid data format received")
-                            return None
-                        try:
-                            relay_data = RelayData(
-                                gsrn=data["gsrn"],
-                                serialnumber=data["serialnumber"],
-                                relay1=parse_relay(data.get("relay1")),
-                                relay2=parse_relay(data.get("relay2")),
-                            )
-                            self.logger.debug("Fetched relay schedule")
-                            self.logger.debug(relay_data)
-                            return relay_data
-                        except (KeyError, ValidationError, ValueError) as e:
-                            self.logger.error("Data validation error: %s", str(e))
-                            return None
-
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Failed to fetch device data: %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        return None
-        except Exception as e:
-            self.logger.error("Error during fetching relay data: %s", str(e))
-        return None
+    def as_cache(self) -> dict:
+        """Tokens and customer data to persist across restarts."""
+        return {
+            "tokens": self.tokens,
+            "token_expiration": self.token_expiration.isoformat(),
+            "customer_token": self.customer_token,
+            "customer_token_expiry": self.customer_token_expiry.isoformat(),
+            "customer_data": self.customer_data,
+        }
 
-    async def fetch_relay_market(
-        self, relay_id: Literal[1, 2]
-    ) -> RelayMarketDataList | None:
-        headers = {"Authorization": f"Bearer {self.customer_token}"}
+    def restore_cache(self, cached: dict):
+        """Restore state saved by as_cache. Expired tokens are refreshed lazily.
 
-        params = {"gsrn": self.gsrn, "relay": relay_id}
+        State another entry of this account already has is left alone.
+        """
+        if not self.tokens and cached.get("tokens"):
+            self.tokens = cached["tokens"]
+            self.authenticated = bool(self.tokens.get("IdToken"))
+            if cached.get("token_expiration"):
+                self.token_expiration = datetime.fromisoformat(
+                    cached["token_expiration"]
+                )
+        if self.customer_data is None and cached.get("customer_data"):
+            self.customer_data = cached["customer_data"]
+            self.customer_token = cached.get("customer_token")
+            if cached.get("customer_token_expiry"):
+                self.customer_token_expiry = datetime.fromisoformat(
+                    cached["customer_token_expiry"]
+                )
 
-        url = RELAY_MARKET_URL
-        try:
-            async with async_timeout.timeout(10):
-                async with self.session.get(
-                    url, headers=headers, params=params
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data is None or not isinstance(data, list):
-                            self.logger.error("Invalid data format received")
-                            return None
-                        try:
-                            relay_market_data = RelayMarketDataList(data)
-                            self.logger.debug("Fetched relay market data")
-                            self.logger.debug(relay_market_data)
-                            return relay_market_data
-                        except (KeyError, ValidationError, ValueError) as e:
-                            self.logger.error("Data validation error: %s", str(e))
-                            return None
-
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Failed to fetch device data: %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        return None
-        except Exception as e:
-            self.logger.error("Error during fetching relay data: %s", str(e))
-        return None
+    async def fetch_5min_readings(
+        self,
+        customer_id: str,
+        gsrn: str,
+        day: date | None = None,
+        response_cache: ResponseCache | None = None,
+    ) -> Measurements | object | None:
+        """Fetch the 5-minute readings of a local day, today by default.
 
-    async def fetch_5min_readings(self) -> Measurements | None:
-        await self.ensure_authenticated()
-        await self.fetch_customer_data_and_token()
+        Identical concurrent requests share one call, and requests for
+        different metering points run in parallel up to the account's limit.
+        """
+        day = day or dt_util.now().date()
+        # a conditional request may answer UNCHANGED, so only those share one
+        key = (customer_id, gsrn, day, response_cache is not None)
+        flight = self._readings_fetches.setdefault(key, SingleFlight())
+        try:
+            return await flight.run(
+                lambda: self._fetch_5min_readings(
+                    customer_id, gsrn, day, response_cache
+                )
+            )
+        finally:
+            self._readings_fetches.pop(key, None)
 
-        headers = {"Authorization": f"Bearer {self.customer_token}"}
+    async def _fetch_5min_readings(
+        self,
+        customer_id: str,
+        gsrn: str,
+        day: date,
+        response_cache: ResponseCache | None = None,
+    ) -> Measurements | object | None:
         params = {
-            "customer_ids": self.customer_id,
-            "gsrn": self.gsrn,
-            "day": dt_util.now().astimezone(dt_util.UTC).strftime("%Y-%m-%d"),
+            "customer_ids": customer_id,
+            "gsrn": gsrn,
+            "day": day.isoformat(),
         }
-        url = METER_READING_URL
-
         try:
-            async with async_timeout.timeout(10):
-                async with self.session.get(
-                    url, headers=headers, params=params
-                ) as resp:
-                    if resp.status == 200:
-                        data: Measurements = await resp.json()
-                        if data is None or type(data) != list or not len(data):
-                            self.logger.error("Invalid data format received")
-                            return None
-                        return data
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Failed to fetch meter readings: %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        return None
-
-        except Exception as e:
-            self.logger.error("Exception during data fetching readings: %s", str(e))
-        return None
+            data: Measurements = await self.request(
+                METER_READING_URL,
+                endpoint="meter_reading",
+                params=params,
+                response_cache=response_cache,
+            )
+        except EleniaRequestError as e:
+            self.logger.error("Failed to fetch meter readings: %s", str(e))
+            return None
+        if data is UNCHANGED:
+            return UNCHANGED
+        if data is None or type(data) != list:
+            self.logger.error("Invalid data format received")
+            if response_cache is not None:
+                response_cache.invalidate()
+            return None
+        return data
+
+    async def fetch_meter_readings(
+        self,
+        customer_id: str,
+        gsrn: str,
+        year: int,
+        response_cache: ResponseCache | None = None,
+    ) -> str | object | None:
+        """Fetch a year of hourly consumption. Used for old metering points.
 
-    async def fetch_meter_readings(self):
-        """Fetch the latest hourly consumption data. Used for old metering points"""
-        await self.ensure_authenticated()
-        await self.fetch_customer_data_and_token()
-        headers = {"Authorization": f"Bearer {self.customer_token}"}
+        The payload is large, so the body is returned as text for
+        hourly.iter_months to decode month by month.
+        """
         params = {
-            "customer_ids": self.customer_id,
-            "gsrn": self.gsrn,
-            "day": dt_util.now().year,
+            "customer_ids": customer_id,
+            "gsrn": gsrn,
+            "day": year,
             "dh": "true",
         }
-        url = METER_READING_URL
         try:
-            async with async_timeout.timeout(10):
-                async with self.session.get(
-                    url, headers=headers, params=params
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if "months" in data:
-                            return data
-                        else:
-                            self.logger.error("Invalid data format received")
-                            return None
-                    else:
-                        error_text = await resp.text()
-                        self.logger.error(
-                            "Failed to fetch meter readings: %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        return None
-        except Exception as e:
-            self.logger.error("Exception during data fetch: %s", str(e))
+            body = await self.request(
+                METER_READING_URL,
+                endpoint="meter_reading_hourly",
+                params=params,
+                response_cache=response_cache,
+                raw=True,
+            )
+        except EleniaRequestError as e:
+            self.logger.error("Failed to fetch meter readings: %s", str(e))
+            return None
+        if body is UNCHANGED:
+            return UNCHANGED
+        try:
+            return body.decode()
+        except UnicodeDecodeError:
+            self.logger.error("Invalid data format received")
+            if response_cache is not None:
+                response_cache.invalidate()
             return None
 
+
+@callback
+def async_get_account(hass: HomeAssistant, config, logger: Logger) -> EleniaAccount:
+    """Return the shared account of a username, creating it on first use."""
+    accounts: dict[str, EleniaAccount] = hass.data.setdefault(
+        DOMAIN, {}
+    ).setdefault(DATA_ACCOUNTS, {})
+    account = accounts.get(config[CONF_USERNAME])
+    if account is None:
+        account = EleniaAccount(
+            hass, config[CONF_USERNAME], config[CONF_PASSWORD], logger
+        )
+        accounts[config[CONF_USERNAME]] = account
+    elif account.password != config[CONF_PASSWORD]:
+        # the newest credentials win, force a fresh login with them
+        account.password = config[CONF_PASSWORD]
+        account.tokens = {}
+        account.authenticated = False
+    account.users += 1
+    return account
+
+
+@callback
+def async_release_account(hass: HomeAssistant, account: EleniaAccount):
+    account.users -= 1
+    if account.users <= 0:
+        hass.data.get(DOMAIN, {}).get(DATA_ACCOUNTS, {}).pop(account.username, None)
+
+
+class EleniaData:
+    """Class to manage fetching data of one metering point from Elenia API."""
+
+    def __init__(self, hass: HomeAssistant, config, logger: Logger):
+        """Initialize the data object."""
+        self.hass = hass
+        self.customer_id = config[CONF_CUSTOMER_ID]
+        self.gsrn = config[CONF_GSRN]
+        self.logger = logger
+        self.account = async_get_account(hass, config, logger)
+        self.session = self.account.session
+        self._resolved_customer_data = None
+        self._meteringpoint = None
+        self.response_caches: dict[str, ResponseCache] = {}
+
+    @property
+    def customer_data(self):
+        return self.account.customer_data
+
+    @property
+    def customer_token(self):
+        return self.account.customer_token
+
+    @property
+    def meteringpoint(self):
+        """This entry's metering point, re-resolved when customer data changes."""
+        if self.account.customer_data is not self._resolved_customer_data:
+            self._resolved_customer_data = self.account.customer_data
+            meteringpoints = (self.account.customer_data or {}).get(
+                self.customer_id, {}
+            ).get("meteringpoints", [])
+            self._meteringpoint = next(
+                (mp for mp in meteringpoints if mp.get("gsrn") == self.gsrn),
+                None,
+            )
+        return self._meteringpoint
+
+    @property
+    def serialnumber(self):
+        meteringpoint = self.meteringpoint
+        return meteringpoint.get("device_serialnumber") if meteringpoint else None
+
+    def response_cache(self, key: str) -> ResponseCache:
+        """Response cache of one request, keeping the most recently used few."""
+        response_cache = self.response_caches.pop(key, None) or ResponseCache()
+        self.response_caches[key] = response_cache
+        while len(self.response_caches) > MAX_RESPONSE_CACHES:
+            del self.response_caches[next(iter(self.response_caches))]
+        return response_cache
+
+    async def ensure_authenticated(self):
+        await self.account.ensure_authenticated()
+
+    async def fetch_customer_data_and_token(self):
+        return await self.account.fetch_customer_data_and_token()
+
+    def as_cache(self) -> dict:
+        return self.account.as_cache()
+
+    def restore_cache(self, cached: dict):
+        self.account.restore_cache(cached)
+
+    async def fetch_relay_schedule(self) -> RelayData | object | None:
+        """Fetch the relay schedule, or UNCHANGED if it is the same as last time."""
+        params = {"gsrn": self.gsrn, "serialnumber": self.serialnumber}
+        response_cache = self.response_cache("relay_control")
+        try:
+            data = await self.account.request(
+                RELAY_CONTROL_URL,
+                endpoint="relay_control",
+                params=params,
+                response_cache=response_cache,
+            )
+        except EleniaRequestError as e:
+            self.logger.error("Error during fetching relay data: %s", str(e))
+            return None
+        if data is UNCHANGED:
+            self.logger.debug("Relay schedule unchanged")
+            return UNCHANGED
+        if (
+            data is None
+            or not isinstance(data, dict)
+            or not isinstance(data.get("relay1"), dict)
+        ):
+            self.logger.error("Invalid data format received")
+            response_cache.invalidate()
+            return None
+        try:
+            relay_data = RelayData(
+                gsrn=data["gsrn"],
+                serialnumber=data["serialnumber"],
+                relay1=parse_relay(data.get("relay1")),
+                relay2=parse_relay(data.get("relay2")),
+            )
+            self.logger.debug("Fetched relay schedule")
+            self.logger.debug(relay_data)
+            return relay_data
+        except (KeyError, ValidationError, ValueError) as e:
+            self.logger.error("Data validation error: %s", str(e))
+            response_cache.invalidate()
+            return None
+
+    async def fetch_relay_market(
+        self, relay_id: Literal[1, 2]
+    ) -> RelayMarketDataList | object | None:
+        """Fetch relay market data, or UNCHANGED if it is the same as last time."""
+        params = {"gsrn": self.gsrn, "relay": relay_id}
+        response_cache = self.response_cache(f"relay_market_{relay_id}")
+        try:
+            data = await self.account.request(
+                RELAY_MARKET_URL,
+                endpoint="relay_market",
+                params=params,
+                response_cache=response_cache,
+            )
+        except EleniaRequestError as e:
+            self.logger.error("Error during fetching relay market data: %s", str(e))
+            return None
+        if data is UNCHANGED:
+            self.logger.debug("Relay %s market data unchanged", relay_id)
+            return UNCHANGED
+        if data is None or not isinstance(data, list):
+            self.logger.error("Invalid data format received")
+            response_cache.invalidate()
+            return None
+        try:
+            relay_market_data = RelayMarketDataList.from_json(data)
+            self.logger.debug("Fetched relay market data")
+            self.logger.debug(relay_market_data)
+            return relay_market_data
+        except (KeyError, ValidationError, ValueError) as e:
+            self.logger.error("Data validation error: %s", str(e))
+            response_cache.invalidate()
+            return None
+
+    async def fetch_5min_readings(
+        self, day: date | None = None, conditional: bool = False
+    ) -> Measurements | object | None:
+        """Fetch a day's readings. If conditional, UNCHANGED may be returned."""
+        day = day or dt_util.now().date()
+        response_cache = (
+            self.response_cache(f"meter_reading_{day.isoformat()}")
+            if conditional
+            else None
+        )
+        return await self.account.fetch_5min_readings(
+            self.customer_id, self.gsrn, day, response_cache
+        )
+
+    async def fetch_meter_readings(self, year: int) -> str | object | None:
+        """Fetch a year of hourly readings. UNCHANGED if the year is as before."""
+        return await self.account.fetch_meter_readings(
+            self.customer_id,
+            self.gsrn,
+            year,
+            self.response_cache(f"meter_reading_hourly_{year}"),
+        )
+
     async def close(self):
-        """Close the session."""
-        await self.session.close()
+        """Release the shared account. The session stays open for other users."""
+        async_release_account(self.hass, self.account)
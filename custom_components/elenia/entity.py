@@ -0,0 +1,55 @@
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class EleniaEntity(CoordinatorEntity):
+    """Coordinator entity that only writes its state when it changed.
+
+    Values are computed into _attr_* fields once per update, so reading the
+    state is an attribute lookup. Most entities change once a day; a refresh
+    or slot boundary that leaves the state as it was is skipped and counted
+    in the coordinator's state_writes.
+
+    Market entities set _slot_listener to be updated from the cached market
+    index at slot boundaries, or with _day_only at the day rollover.
+    """
+
+    _written_state: tuple[Any, ...] | None = None
+    # re-evaluate at the coordinator's slot boundaries, or only at midnight
+    _slot_listener = False
+    _day_only = False
+
+    def _update_attrs(self) -> None:
+        """Compute the _attr_* fields from the coordinator data."""
+
+    def _state_key(self) -> tuple[Any, ...]:
+        return (self.available, self.state, self.extra_state_attributes)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # the platform writes the initial state right after this
+        self._update_attrs()
+        self._written_state = self._state_key()
+        if self._slot_listener:
+            self.async_on_remove(
+                self.coordinator.slot_scheduler.async_add_listener(
+                    self.async_write_ha_state_if_changed, day_only=self._day_only
+                )
+            )
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        self._update_attrs()
+        state = self._state_key()
+        if state == self._written_state:
+            self.coordinator.state_writes.skipped += 1
+            return
+        self._written_state = state
+        self.coordinator.state_writes.written += 1
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.async_write_ha_state_if_changed()
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import GAP_REFETCH_INTERVAL, GAP_REFETCH_MAX_ATTEMPTS, GAP_REFETCH_MAX_DAYS
+from .consumption import SLOT_SECONDS
+from .readings import DaySeries, ReadingBuffer, local_day_of, to_epoch
+
+
+@dataclass
+class DayGaps:
+    """Slot ends (epoch seconds) of a day that are missing or estimated."""
+
+    missing: list[int] = field(default_factory=list)
+    # readings Elenia flagged with a non-zero quality
+    estimated: list[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.estimated)
+
+
+def day_gaps(series: DaySeries, day: date, horizon: int) -> DayGaps:
+    """Missing and estimated slots of a day, up to the newest slot end.
+
+    Missing slots are filled in from the jumps between stored slot ends, so
+    the work beyond the scan is proportional to the number of missing slots.
+    """
+    first = int(dt_util.start_of_local_day(day).timestamp()) + SLOT_SECONDS
+    last = min(
+        int(dt_util.start_of_local_day(day + timedelta(days=1)).timestamp()), horizon
+    )
+    gaps = DayGaps()
+    expected = first
+    for t, quality in zip(series.t, series.quality):
+        if t > expected:
+            end = min(t, last + SLOT_SECONDS)
+            gaps.missing.extend(range(expected, end, SLOT_SECONDS))
+        expected = t + SLOT_SECONDS
+        if quality:
+            gaps.estimated.append(t)
+    gaps.missing.extend(range(expected, last + SLOT_SECONDS, SLOT_SECONDS))
+    return gaps
+
+
+@dataclass
+class RefetchAttempts:
+    count: int = 0
+    last: datetime | None = None
+
+
+class GapTracker:
+    """Missing and estimated slots per buffered day, and their re-fetches.
+
+    Only days a merge touched are re-scanned, plus buffered-range days that
+    have no readings at all, which count as fully missing. Days with gaps are re-fetched
+    on their own, a few per refresh, with the wait doubling after each try
+    that brings nothing new, until GAP_REFETCH_MAX_ATTEMPTS is reached.
+    """
+
+    def __init__(self):
+        self.days: dict[date, DayGaps] = {}
+        self.attempts: dict[date, RefetchAttempts] = {}
+
+    def update(self, readings: ReadingBuffer, days):
+        horizon = to_epoch(readings.last_dt) if readings.last_dt else 0
+        empty_days = self.empty_days(readings)
+        for day in set(days) | set(empty_days):
+            series = readings.days.get(day)
+            if series is None and day in empty_days:
+                # nothing at all came in for the day, e.g. while HA was down
+                series = DaySeries()
+            gaps = day_gaps(series, day, horizon) if series is not None else None
+            if not gaps:
+                self.days.pop(day, None)
+                self.attempts.pop(day, None)
+                continue
+            if gaps != self.days.get(day):
+                # progress, so start the backoff over
+                self.attempts.pop(day, None)
+            self.days[day] = gaps
+
+    @staticmethod
+    def empty_days(readings: ReadingBuffer) -> list[date]:
+        """Days without readings between the oldest buffered day and the newest."""
+        if not readings.days or not readings.last_dt:
+            return []
+        first = min(readings.days)
+        newest = local_day_of(readings.last_dt)
+        return [
+            first + timedelta(days=offset)
+            for offset in range((newest - first).days)
+            if first + timedelta(days=offset) not in readings.days
+        ]
+
+    def due(self, now: datetime, exclude=()) -> list[date]:
+        """Days worth re-fetching now, newest first."""
+        due = []
+        for day in sorted(self.days, reverse=True):
+            if day in exclude:
+                continue
+            attempts = self.attempts.get(day)
+            if attempts is not None and (
+                attempts.count >= GAP_REFETCH_MAX_ATTEMPTS
+                or now - attempts.last
+                < GAP_REFETCH_INTERVAL * 2 ** (attempts.count - 1)
+            ):
+                continue
+            due.append(day)
+            if len(due) == GAP_REFETCH_MAX_DAYS:
+                break
+        return due
+
+    def record_attempt(self, day: date, now: datetime):
+        attempts = self.attempts.setdefault(day, RefetchAttempts())
+        attempts.count += 1
+        attempts.last = now
+
+    def prune(self, keep_from: date):
+        for day in [day for day in self.days if day < keep_from]:
+            del self.days[day]
+            self.attempts.pop(day, None)
+
+    def as_dict(self) -> dict:
+        return {
+            day.isoformat(): {
+                "missing": len(gaps.missing),
+                "estimated": len(gaps.estimated),
+                "refetch_attempts": (
+                    self.attempts[day].count if day in self.attempts else 0
+                ),
+            }
+            for day, gaps in sorted(self.days.items())
+        }
@@ -0,0 +1,215 @@
+from array import array
+from datetime import datetime, timezone
+import json
+from typing import Any, Iterator
+
+from homeassistant.util import dt as dt_util
+
+from .readings import to_epoch
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = json.decoder.WHITESPACE
+
+
+def _skip(body: str, i: int, expected: str | None = None) -> int:
+    i = _WHITESPACE.match(body, i).end()
+    if expected is not None:
+        if body[i : i + 1] != expected:
+            raise ValueError(f"Expected {expected!r} at {i}")
+        i = _WHITESPACE.match(body, i + 1).end()
+    return i
+
+
+def _next_item(body: str, i: int, close: str) -> int:
+    """Skip the comma after an item, or stop at the closing bracket."""
+    i = _skip(body, i)
+    if body[i : i + 1] == ",":
+        return _skip(body, i, ",")
+    if body[i : i + 1] != close:
+        raise ValueError(f"Expected ',' or {close!r} at {i}")
+    return i
+
+
+def iter_months(body: str) -> Iterator[tuple[int, Any]]:
+    """Decode the yearly payload one month at a time.
+
+    Only the top-level object is walked by hand; each element of "months"
+    is decoded on its own with raw_decode, so at most one month is held as
+    Python objects at a time. "months" may be a list in month order or an
+    object keyed by month number. Other top-level keys are skipped.
+    """
+    i = _skip(body, 0, "{")
+    while body[i : i + 1] != "}":
+        key, i = _DECODER.raw_decode(body, i)
+        i = _skip(body, i, ":")
+        if key != "months":
+            _, i = _DECODER.raw_decode(body, i)
+        elif body[i : i + 1] == "[":
+            i = _skip(body, i, "[")
+            month = 1
+            while body[i : i + 1] != "]":
+                value, i = _DECODER.raw_decode(body, i)
+                yield month, value
+                month += 1
+                i = _next_item(body, i, "]")
+            i = _skip(body, i, "]")
+        else:
+            i = _skip(body, i, "{")
+            while body[i : i + 1] != "}":
+                month, i = _DECODER.raw_decode(body, i)
+                i = _skip(body, i, ":")
+                value, i = _DECODER.raw_decode(body, i)
+                yield int(month), value
+                i = _next_item(body, i, "}")
+            i = _skip(body, i, "}")
+        i = _next_item(body, i, "}")
+    _skip(body, i, "}")
+
+
+class MonthSeries:
+    """One month of hourly consumption: UTC hour ends (epoch) and Wh."""
+
+    __slots__ = ("t", "wh")
+
+    def __init__(self):
+        self.t = array("q")
+        self.wh = array("q")
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, MonthSeries) and self.t == other.t and self.wh == other.wh
+        )
+
+    @property
+    def total(self) -> float:
+        """kWh."""
+        return sum(self.wh) / 1000
+
+    @classmethod
+    def from_json(cls, month: dict | list) -> "MonthSeries":
+        """Hours of a month, as {"hours": [{"dt": ..., "a": Wh}, ...]} or a list.
+
+        Like the 5-minute readings, "dt" is the UTC end of the hour. Hours
+        with a null value are left out.
+        """
+        hours = month.get("hours", []) if isinstance(month, dict) else month
+        if not isinstance(hours, list):
+            raise ValueError("Hours of a month must be a list")
+        series = cls()
+        for hour in sorted(
+            (hour for hour in hours if hour.get("a") is not None),
+            key=lambda hour: hour["dt"],
+        ):
+            t = to_epoch(hour["dt"])
+            if series.t and series.t[-1] == t:
+                series.wh[-1] = int(hour["a"])
+                continue
+            series.t.append(t)
+            series.wh.append(int(hour["a"]))
+        return series
+
+    def as_dict(self) -> dict:
+        return {"t": self.t.tolist(), "wh": self.wh.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MonthSeries":
+        series = cls()
+        series.t.extend(data["t"])
+        series.wh.extend(data["wh"])
+        return series
+
+
+class HourlyReadings:
+    """A year of hourly readings from a legacy meter, month by month.
+
+    The first refresh of a year converts every month. After that, months
+    before the last one processed are decoded only to find the next one,
+    since Elenia only adds to the latest month. Months that come back
+    identical are not reported as changed.
+    """
+
+    def __init__(self):
+        self.year: int | None = None
+        self.months: dict[int, MonthSeries] = {}
+        # kWh before this year, so the statistics sum carries over
+        self.year_start_sum = 0.0
+        self.version = 0
+
+    @property
+    def processed_month(self) -> int:
+        return max(self.months, default=1)
+
+    def merge(self, year: int, body: str) -> list[int]:
+        """Merge a yearly payload, returning the months that changed."""
+        if self.year is None:
+            self.year = year
+        elif year > self.year:
+            self.year_start_sum += self.total()
+            self.year = year
+            self.months = {}
+        elif year < self.year:
+            return []
+        changed = []
+        first = self.processed_month
+        for month, value in iter_months(body):
+            if month < first:
+                continue
+            series = MonthSeries.from_json(value)
+            if series and series != self.months.get(month):
+                self.months[month] = series
+                changed.append(month)
+        if changed:
+            self.version += 1
+        return changed
+
+    def total(self) -> float:
+        return sum(series.total for series in self.months.values())
+
+    def month_total(self, month: int) -> float | None:
+        series = self.months.get(month)
+        return round(series.total, 3) if series else None
+
+    @property
+    def latest(self) -> tuple[datetime, float] | None:
+        """Start of the newest hour and its kWh."""
+        series = self.months.get(self.processed_month)
+        if not series:
+            return None
+        start = datetime.fromtimestamp(series.t[-1] - 3600, timezone.utc)
+        return dt_util.as_local(start), series.wh[-1] / 1000
+
+    def hourly_sums(self, month: int) -> list[tuple[datetime, float, float]]:
+        """(hour start, kWh, cumulative kWh) of a month, for statistics."""
+        running = self.year_start_sum + sum(
+            series.total for m, series in self.months.items() if m < month
+        )
+        sums = []
+        series = self.months.get(month)
+        for t, wh in zip(series.t, series.wh) if series else ():
+            running += wh / 1000
+            start = datetime.fromtimestamp(t - 3600, timezone.utc)
+            sums.append((start, wh / 1000, running))
+        return sums
+
+    def as_dict(self) -> dict:
+        return {
+            "year": self.year,
+            "year_start_sum": self.year_start_sum,
+            "months": {
+                str(month): series.as_dict() for month, series in self.months.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HourlyReadings":
+        readings = cls()
+        readings.year = data.get("year")
+        readings.year_start_sum = data.get("year_start_sum", 0.0)
+        readings.months = {
+            int(month): MonthSeries.from_dict(series)
+            for month, series in data.get("months", {}).items()
+        }
+        return readings
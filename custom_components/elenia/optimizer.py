@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+import random
+
+from homeassistant.util import dt as dt_util
+
+from .types import MarketIndex
+
+
+@dataclass(frozen=True)
+class PriceSlot:
+    start: int
+    end: int
+    price: float
+
+
+@dataclass(frozen=True)
+class CheapestSlots:
+    slots: list[PriceSlot]
+
+    @property
+    def start(self) -> int:
+        return self.slots[0].start
+
+    @property
+    def end(self) -> int:
+        return self.slots[-1].end
+
+    @property
+    def average_price(self) -> float:
+        return sum(slot.price for slot in self.slots) / len(self.slots)
+
+    def contains(self, timestamp: float) -> bool:
+        return any(slot.start <= timestamp < slot.end for slot in self.slots)
+
+    def as_dict(self) -> dict:
+        return {
+            "start": _isoformat(self.start),
+            "end": _isoformat(self.end),
+            "average_price": round(self.average_price, 3),
+            "slots": [
+                {
+                    "start": _isoformat(slot.start),
+                    "end": _isoformat(slot.end),
+                    "price": slot.price,
+                }
+                for slot in self.slots
+            ],
+        }
+
+
+def _isoformat(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, dt_util.DEFAULT_TIME_ZONE).isoformat()
+
+
+def upcoming_slots(
+    market_index: MarketIndex, now: datetime, deadline: datetime | None = None
+) -> list[PriceSlot]:
+    """Total-price slots of today and tomorrow from the current one to deadline.
+
+    Slots are split to the shortest slot length present, so a day in hourly
+    and a day in quarter-hour slots can be searched together.
+    """
+    today = now.date()
+    days = [market_index.get(day.isoformat()) for day in (today, _next(today))]
+    days = [day_slots for day_slots in days if day_slots]
+    if not days:
+        return []
+    step = min(day_slots.slot_seconds for day_slots in days)
+    current = now.timestamp()
+    limit = deadline.timestamp() if deadline else None
+    slots = []
+    for day_slots in days:
+        for start, slot in day_slots.items():
+            for sub_start in range(start, start + day_slots.slot_seconds, step):
+                sub_end = sub_start + step
+                if sub_end <= current:
+                    continue
+                if limit is not None and sub_end > limit:
+                    return slots
+                slots.append(PriceSlot(sub_start, sub_end, slot.total))
+    return slots
+
+
+def _next(day: date) -> date:
+    return day + timedelta(days=1)
+
+
+def next_deadline(now: datetime, at: time) -> datetime:
+    """The next time the clock shows `at`, today or tomorrow."""
+    deadline = datetime.combine(now.date(), at, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    if deadline <= now:
+        deadline = datetime.combine(
+            _next(now.date()), at, tzinfo=dt_util.DEFAULT_TIME_ZONE
+        )
+    return deadline
+
+
+def _kth_smallest(values: list[float], k: int) -> float:
+    """Quickselect: the k-th smallest value (0-based) in expected O(n)."""
+    values = list(values)
+    while True:
+        pivot = random.choice(values)
+        lower = [value for value in values if value < pivot]
+        equal_count = sum(1 for value in values if value == pivot)
+        if k < len(lower):
+            values = lower
+        elif k < len(lower) + equal_count:
+            return pivot
+        else:
+            k -= len(lower) + equal_count
+            values = [value for value in values if value > pivot]
+
+
+def cheapest_slots(slots: list[PriceSlot], count: int) -> CheapestSlots | None:
+    """The `count` cheapest slots, not necessarily adjacent, in time order.
+
+    Ties at the threshold price go to the earliest slots.
+    """
+    if count <= 0 or count > len(slots):
+        return None
+    threshold = _kth_smallest([slot.price for slot in slots], count - 1)
+    below = sum(1 for slot in slots if slot.price < threshold)
+    ties_left = count - below
+    selected = []
+    for slot in slots:
+        if slot.price < threshold:
+            selected.append(slot)
+        elif slot.price == threshold and ties_left > 0:
+            selected.append(slot)
+            ties_left -= 1
+    return CheapestSlots(selected)
+
+
+def cheapest_window(slots: list[PriceSlot], count: int) -> CheapestSlots | None:
+    """The cheapest run of `count` back-to-back slots, by a sliding sum.
+
+    A gap in the data restarts the run. The earliest window wins a tie.
+    """
+    if count <= 0:
+        return None
+    best_sum = None
+    best_end = None
+    window_sum = 0.0
+    run_start = 0
+    for i, slot in enumerate(slots):
+        if i > 0 and slots[i - 1].end != slot.start:
+            run_start = i
+            window_sum = 0.0
+        window_sum += slot.price
+        if i - run_start >= count:
+            window_sum -= slots[i - count].price
+        if i - run_start + 1 >= count and (best_sum is None or window_sum < best_sum):
+            best_sum = window_sum
+            best_end = i
+    if best_end is None:
+        return None
+    return CheapestSlots(slots[best_end - count + 1 : best_end + 1])
+
+
+def find_cheapest(
+    market_index: MarketIndex,
+    duration: timedelta,
+    contiguous: bool = True,
+    deadline: datetime | None = None,
+    now: datetime | None = None,
+) -> CheapestSlots | None:
+    """Cheapest slots covering `duration` between now and the deadline."""
+    slots = upcoming_slots(market_index, now or dt_util.now(), deadline)
+    if not slots:
+        return None
+    step = slots[0].end - slots[0].start
+    count = -(-int(duration.total_seconds()) // step)
+    if contiguous:
+        return cheapest_window(slots, count)
+    return cheapest_slots(slots, count)
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+from datetime import timedelta
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_MAX_JITTER,
+    DATA_RATE_LIMITER,
+    DEFAULT_MAX_JITTER,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_BURST,
+    DOMAIN,
+)
+
+
+class TokenBucket:
+    """Rate limiter shared by every Elenia account of the domain.
+
+    Waiters are served in arrival order. Queue wait time is tracked so a
+    limit that is too tight shows up in the diagnostics.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.delayed_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token, returning the seconds spent waiting."""
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        waited = time.monotonic() - started
+        self.requests += 1
+        if waited > 0.001:
+            self.delayed_requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def as_dict(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "requests": self.requests,
+            "delayed_requests": self.delayed_requests,
+            "average_wait": self.total_wait / self.requests if self.requests else 0,
+            "max_wait": self.max_wait,
+        }
+
+
+@callback
+def async_get_rate_limiter(hass: HomeAssistant) -> TokenBucket:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_RATE_LIMITER not in domain_data:
+        domain_data[DATA_RATE_LIMITER] = TokenBucket(
+            DEFAULT_RATE_LIMIT, DEFAULT_RATE_LIMIT_BURST
+        )
+    return domain_data[DATA_RATE_LIMITER]
+
+
+def entry_jitter(hass: HomeAssistant, entry_id: str) -> timedelta:
+    """Stable per-entry offset in [0, max_jitter], so entries spread out."""
+    max_jitter = hass.data.get(DOMAIN, {}).get(DATA_MAX_JITTER, DEFAULT_MAX_JITTER)
+    digest = hashlib.sha256(entry_id.encode()).digest()
+    max_seconds = int(max_jitter.total_seconds())
+    return timedelta(seconds=int.from_bytes(digest[:4], "big") % (max_seconds + 1))
+
+
+def next_aligned_refresh(interval: timedelta, offset: timedelta) -> timedelta:
+    """Delay until the next interval boundary shifted by offset."""
+    now = dt_util.utcnow()
+    interval_seconds = interval.total_seconds()
+    offset_seconds = offset.total_seconds() % interval_seconds
+    elapsed = (now.timestamp() - offset_seconds) % interval_seconds
+    return timedelta(seconds=interval_seconds - elapsed)
@@ -0,0 +1,225 @@
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+
+from .types import Measurement, Measurements
+
+SLOT_LENGTH = timedelta(minutes=5)
+DT_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# stored in the value columns for readings Elenia sent as null
+MISSING = -(2**63)
+VALUE_COLUMNS = ("a", "a1", "a2", "a3", "a_", "r")
+
+
+def parse_slot_end(dt: str) -> datetime:
+    """Parse the UTC end time of a 5-minute slot, e.g. "2024-10-26T11:45:00"."""
+    return datetime.strptime(dt, DT_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def local_day_of(dt: str) -> date:
+    """Local day a slot belongs to. The slot ending at midnight is the last one."""
+    return dt_util.as_local(parse_slot_end(dt) - SLOT_LENGTH).date()
+
+
+def to_epoch(dt: str) -> int:
+    return int(datetime.fromisoformat(dt).replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_epoch(t: int) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime(DT_FORMAT)
+
+
+class DaySeries:
+    """One local day of 5-minute readings in typed columns.
+
+    Slot end times are epoch seconds kept in ascending order, so lookups are
+    a bisect and in-order arrivals are plain appends. Only the columns the
+    integration uses are kept; nulls are stored as MISSING.
+    """
+
+    __slots__ = ("t", "modified", "quality", *VALUE_COLUMNS)
+
+    def __init__(self):
+        self.t = array("q")
+        self.modified = array("q")
+        self.quality = array("i")
+        for column in VALUE_COLUMNS:
+            setattr(self, column, array("q"))
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def index_of(self, t: int) -> int | None:
+        i = bisect_left(self.t, t)
+        if i < len(self.t) and self.t[i] == t:
+            return i
+        return None
+
+    def upsert(self, measurement: Measurement) -> bool:
+        """Insert or overwrite a slot, returning False if it was already there."""
+        t = to_epoch(measurement["dt"])
+        try:
+            modified = to_epoch(measurement.get("modified") or "")
+        except ValueError:
+            modified = 0
+        quality = measurement.get("quality") or 0
+        values = [
+            MISSING if measurement.get(column) is None else int(measurement[column])
+            for column in VALUE_COLUMNS
+        ]
+
+        i = bisect_left(self.t, t)
+        if i < len(self.t) and self.t[i] == t:
+            if (
+                self.modified[i] == modified
+                and self.quality[i] == quality
+                and all(
+                    getattr(self, column)[i] == value
+                    for column, value in zip(VALUE_COLUMNS, values)
+                )
+            ):
+                return False
+            self.modified[i] = modified
+            self.quality[i] = quality
+            for column, value in zip(VALUE_COLUMNS, values):
+                getattr(self, column)[i] = value
+            return True
+
+        if i == len(self.t):
+            self.t.append(t)
+            self.modified.append(modified)
+            self.quality.append(quality)
+            for column, value in zip(VALUE_COLUMNS, values):
+                getattr(self, column).append(value)
+        else:
+            self.t.insert(i, t)
+            self.modified.insert(i, modified)
+            self.quality.insert(i, quality)
+            for column, value in zip(VALUE_COLUMNS, values):
+                getattr(self, column).insert(i, value)
+        return True
+
+    def column(self, name: str) -> list[int | None]:
+        return [None if value == MISSING else value for value in getattr(self, name)]
+
+    def row(self, i: int) -> Measurement:
+        measurement = {
+            "dt": from_epoch(self.t[i]),
+            "modified": from_epoch(self.modified[i]) if self.modified[i] else None,
+            "quality": self.quality[i],
+        }
+        for column in VALUE_COLUMNS:
+            value = getattr(self, column)[i]
+            measurement[column] = None if value == MISSING else value
+        return measurement
+
+    def rows(self) -> Measurements:
+        return [self.row(i) for i in range(len(self.t))]
+
+    def as_dict(self) -> dict:
+        data = {
+            "t": self.t.tolist(),
+            "modified": self.modified.tolist(),
+            "quality": self.quality.tolist(),
+        }
+        for column in VALUE_COLUMNS:
+            data[column] = self.column(column)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DaySeries":
+        series = cls()
+        series.t.extend(data["t"])
+        series.modified.extend(data["modified"])
+        series.quality.extend(data["quality"])
+        for column in VALUE_COLUMNS:
+            getattr(series, column).extend(
+                MISSING if value is None else value for value in data[column]
+            )
+        return series
+
+
+class ReadingBuffer:
+    """In-memory 5-minute readings of the most recent local days.
+
+    Elenia always returns the whole day. Each row is compared with the slot
+    stored for it, so only new or revised slots are merged. There is no
+    buffer-wide mark to skip rows by: Elenia fills and revises older days
+    after newer ones, with `modified` values that need not be the newest.
+    """
+
+    def __init__(self):
+        self.days: dict[date, DaySeries] = {}
+        self.last_dt: str = ""  # newest slot end seen
+        self.version = 0  # bumped whenever a merge changes something
+
+    @property
+    def latest(self) -> Measurement | None:
+        if not self.last_dt:
+            return None
+        series = self.days.get(local_day_of(self.last_dt))
+        i = series.index_of(to_epoch(self.last_dt)) if series else None
+        return series.row(i) if i is not None else None
+
+    def day(self, day: date) -> Measurements:
+        series = self.days.get(day)
+        return series.rows() if series else []
+
+    def is_complete(self, day: date) -> bool:
+        """True once the slot ending at the following local midnight is in."""
+        series = self.days.get(day)
+        if series is None:
+            return False
+        next_midnight = dt_util.start_of_local_day(day + timedelta(days=1))
+        return series.index_of(int(next_midnight.timestamp())) is not None
+
+    def merge(self, measurements: Measurements) -> Measurements:
+        """Merge a meter_reading response, returning the new or changed slots."""
+        changed: Measurements = []
+        last_dt = self.last_dt
+        for measurement in measurements:
+            dt = measurement.get("dt")
+            if not dt or measurement.get("a") is None:
+                continue
+            series = self.days.get(day := local_day_of(dt))
+            if series is None:
+                series = self.days[day] = DaySeries()
+            if not series.upsert(measurement):
+                continue
+            changed.append(measurement)
+            last_dt = max(last_dt, dt)
+
+        self.last_dt = last_dt
+        if changed:
+            self.version += 1
+        return changed
+
+    def prune(self, keep_from: date):
+        for day in [day for day in self.days if day < keep_from]:
+            del self.days[day]
+
+    def as_dict(self) -> dict:
+        return {
+            "last_dt": self.last_dt,
+            "days": {
+                day.isoformat(): series.as_dict() for day, series in self.days.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReadingBuffer":
+        buffer = cls()
+        buffer.last_dt = data.get("last_dt", "")
+        for day, stored in data.get("days", {}).items():
+            if isinstance(stored, list):
+                # stored by older versions as a list of raw measurements
+                series = DaySeries()
+                for measurement in sorted(stored, key=lambda m: m["dt"]):
+                    series.upsert(measurement)
+            else:
+                series = DaySeries.from_dict(stored)
+            buffer.days[date.fromisoformat(day)] = series
+        return buffer
@@ -0,0 +1,257 @@
+import asyncio
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+import hashlib
+import json
+from logging import Logger
+import random
+import time
+from typing import Any, AsyncContextManager, Callable
+
+import aiohttp
+import async_timeout
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    REQUEST_ATTEMPTS,
+    REQUEST_TIMEOUT,
+)
+
+
+class EleniaRequestError(Exception):
+    """A request to Elenia or Cognito failed."""
+
+
+class EleniaTransientError(EleniaRequestError):
+    """Timeouts, throttling and server errors. Worth retrying."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EleniaAuthError(EleniaRequestError):
+    """The token or credentials were rejected."""
+
+
+class EleniaPermanentError(EleniaRequestError):
+    """The request itself is wrong. Retrying will not help."""
+
+
+class EleniaCircuitOpenError(EleniaRequestError):
+    """The endpoint has failed repeatedly and is not called for a while."""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, in seconds or HTTP-date form."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - dt_util.utcnow()).total_seconds())
+
+
+def classify_response(
+    status: int, text: str, retry_after: str | None = None
+) -> EleniaRequestError:
+    message = f"{status} - {text}"
+    # Cognito answers 400 for both rejected tokens and throttling
+    if "NotAuthorizedException" in text or status in (401, 403):
+        return EleniaAuthError(message)
+    if "TooManyRequestsException" in text or status in (408, 425, 429) or status >= 500:
+        return EleniaTransientError(message, parse_retry_after(retry_after))
+    return EleniaPermanentError(message)
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float | None:
+    """Full-jitter exponential backoff. Retry-After wins when the server sends it.
+
+    None means the server asked to wait longer than BACKOFF_MAX, so the request
+    should not be retried now.
+    """
+    if retry_after is not None:
+        return retry_after if retry_after <= BACKOFF_MAX else None
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+# returned instead of the body when a conditional request finds no change
+UNCHANGED = object()
+
+
+class ResponseCache:
+    """Validators and body hash of the last response to one request.
+
+    Sends If-None-Match / If-Modified-Since when the server gave validators,
+    and otherwise compares a hash of the raw body so an unchanged payload is
+    not parsed again. Counts how often the work could be skipped.
+    """
+
+    def __init__(self):
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.body_hash: bytes | None = None
+        self.requests = 0
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def is_unchanged(self, body: bytes) -> bool:
+        body_hash = hashlib.blake2b(body, digest_size=16).digest()
+        if body_hash == self.body_hash:
+            self.unchanged += 1
+            return True
+        self.body_hash = body_hash
+        return False
+
+    def invalidate(self):
+        """Forget the last response, e.g. when its body failed validation."""
+        self.etag = None
+        self.last_modified = None
+        self.body_hash = None
+
+    def update_validators(self, headers):
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+
+    def as_dict(self) -> dict:
+        skipped = self.not_modified + self.unchanged
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "unchanged_body": self.unchanged,
+            "skip_rate": skipped / self.requests if self.requests else 0,
+        }
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after repeated transient failures.
+
+    After CIRCUIT_RESET_TIMEOUT one trial request is let through; its result
+    closes the circuit again or keeps it open for another period.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= CIRCUIT_RESET_TIMEOUT.total_seconds():
+            # half-open: let one request through and re-arm the timer
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        return {"failures": self.failures, "open": self.is_open}
+
+
+async def request_json(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    *,
+    breaker: CircuitBreaker,
+    logger: Logger,
+    slot: Callable[[], AsyncContextManager] = nullcontext,
+    attempts: int = REQUEST_ATTEMPTS,
+    response_cache: ResponseCache | None = None,
+    headers: dict | None = None,
+    raw: bool = False,
+    **kwargs,
+) -> Any:
+    """Send a request and return its JSON body, retrying transient failures.
+
+    With a response_cache, UNCHANGED is returned when the server answers 304
+    or the body is byte-for-byte the previous one. With raw, the body is
+    returned undecoded for the caller to parse incrementally.
+
+    Raises EleniaAuthError, EleniaPermanentError, EleniaCircuitOpenError, or
+    EleniaTransientError once the attempts are used up.
+    """
+    headers = dict(headers or {})
+    if response_cache is not None:
+        response_cache.requests += 1
+        headers.update(response_cache.headers())
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise EleniaCircuitOpenError(f"Circuit open for {breaker.name}")
+        try:
+            async with slot(), async_timeout.timeout(REQUEST_TIMEOUT):
+                async with session.request(
+                    method, url, headers=headers, **kwargs
+                ) as resp:
+                    if resp.status == 304 and response_cache is not None:
+                        breaker.record_success()
+                        response_cache.not_modified += 1
+                        return UNCHANGED
+                    if resp.status == 200:
+                        body = await resp.read()
+                        breaker.record_success()
+                        if response_cache is not None:
+                            if response_cache.is_unchanged(body):
+                                return UNCHANGED
+                            response_cache.update_validators(resp.headers)
+                        if raw:
+                            return body
+                        try:
+                            return json.loads(body)
+                        except ValueError as e:
+                            if response_cache is not None:
+                                response_cache.invalidate()
+                            raise EleniaPermanentError(f"Invalid JSON: {e}") from e
+                    error = classify_response(
+                        resp.status, await resp.text(), resp.headers.get("Retry-After")
+                    )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            error = EleniaTransientError(f"{type(e).__name__}: {e}")
+        except EleniaPermanentError as e:
+            error = e
+
+        if isinstance(error, EleniaTransientError):
+            # a bad request says nothing about the endpoint's health, and the
+            # breaker is shared by every metering point of the account
+            breaker.record_failure()
+        if not isinstance(error, EleniaTransientError) or attempt == attempts - 1:
+            raise error
+        delay = backoff_delay(attempt, error.retry_after)
+        if delay is None:
+            raise error
+        logger.debug(
+            "Request to %s failed (%s), retrying in %.1f s", breaker.name, error, delay
+        )
+        await asyncio.sleep(delay)
+    raise EleniaTransientError(f"No attempts made for {breaker.name}")
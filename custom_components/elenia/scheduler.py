@@ -0,0 +1,75 @@
+from datetime import datetime
+import logging
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SlotScheduler:
+    """Pushes entity states at clock-aligned slot boundaries.
+
+    Nothing is fetched here: listeners re-read the cached market index.
+    Slot listeners run at every slot boundary, day listeners only at local
+    midnight when the index rolls over to the next day.
+    """
+
+    def __init__(self, hass: HomeAssistant, slot_minutes: int = 60):
+        self.hass = hass
+        self.slot_minutes = slot_minutes
+        self._slot_listeners: set[Callable[[], None]] = set()
+        self._day_listeners: set[Callable[[], None]] = set()
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self):
+        if self._unsub is not None:
+            return
+        self._unsub = async_track_time_change(
+            self.hass,
+            self._handle_boundary,
+            minute=list(range(0, 60, self.slot_minutes)),
+            second=0,
+        )
+
+    @callback
+    def async_stop(self):
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def set_slot_minutes(self, slot_minutes: int):
+        """Switch between hourly and quarter-hour boundaries."""
+        if slot_minutes == self.slot_minutes:
+            return
+        if 60 % slot_minutes:
+            raise ValueError(f"Slot length must divide an hour, got {slot_minutes}")
+        self.slot_minutes = slot_minutes
+        if self._unsub is not None:
+            self.async_stop()
+            self.async_start()
+
+    @callback
+    def async_add_listener(
+        self, update_callback: Callable[[], None], day_only: bool = False
+    ) -> CALLBACK_TYPE:
+        listeners = self._day_listeners if day_only else self._slot_listeners
+        listeners.add(update_callback)
+
+        @callback
+        def remove_listener():
+            listeners.discard(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _handle_boundary(self, now: datetime):
+        listeners = list(self._slot_listeners)
+        if now.hour == 0 and now.minute == 0:
+            listeners.extend(self._day_listeners)
+        _LOGGER.debug("Slot boundary %s, updating %s entities", now, len(listeners))
+        for update_callback in listeners:
+            update_callback()
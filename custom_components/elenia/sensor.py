@@ -1,79 +1,57 @@
-from dataclasses import dataclass
-from datetime import datetime, timezone
 import logging
-from typing import Literal
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Literal
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME, CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC, format_mac
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-from homeassistant.util import dt as dt_util
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util, slugify
 
 from .const import (
     CONF_CUSTOMER_ID,
     CONF_GSRN,
     DOMAIN,
-    UPDATE_INTERVAL,
     CONF_PRICE_SENSOR_FOR_EACH_HOUR,
     CONF_RELAY_SENSOR_FOR_EACH_HOUR,
+    CONF_FORECAST_SENSORS,
+    CONF_CONTIGUOUS,
+    CONF_DEADLINE,
+    CONF_DURATION,
+    DATA_CHEAPEST_WINDOWS,
 )
-from .elenia_data import EleniaData, Measurements
-from .types import RelayData, RelayMarketDataList
+from .coordinator import (
+    ConsumptionCoordinator,
+    ConsumptionCoordinatorData,
+    EleniaRuntimeData,
+    HourlyMeterCoordinator,
+    HourlyMeterCoordinatorData,
+    MarketCoordinator,
+    MarketCoordinatorData,
+)
+from .entity import EleniaEntity
+from .optimizer import CheapestSlots, find_cheapest, next_deadline
+from .readings import parse_slot_end
+from .types import MarketSlot
 
 _LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
-class CoordinatorData:
-    consumption_data: Measurements
-    relay_schedule_data: RelayData
-    relay1_market_data: RelayMarketDataList
-    relay2_market_data: RelayMarketDataList
-
-
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
-    elenia_data: EleniaData = hass.data[DOMAIN][entry.entry_id]
-
-    async def async_update_data():
-        consumption_data: Measurements = await elenia_data.fetch_5min_readings()
-        if consumption_data is None:
-            raise UpdateFailed("Failed to fetch consumption data")
-        relay_schedule_data = await elenia_data.fetch_relay_schedule()
-        if relay_schedule_data is None:
-            raise UpdateFailed("Failed to fetch relay data")
-        relay1_market_data = await elenia_data.fetch_relay_market(1)
-        if relay1_market_data is None:
-            raise UpdateFailed("Failed to fetch relay1 market data")
-        relay2_market_data = await elenia_data.fetch_relay_market(2)
-        if relay2_market_data is None:
-            raise UpdateFailed("Failed to fetch relay2 market data")
-
-        return CoordinatorData(
-            consumption_data,
-            relay_schedule_data,
-            relay1_market_data,
-            relay2_market_data,
-        )
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="Elenia",
-        update_method=async_update_data,
-        update_interval=UPDATE_INTERVAL,
-    )
-
-    await coordinator.async_config_entry_first_refresh()
+    runtime_data: EleniaRuntimeData = hass.data[DOMAIN][entry.entry_id]
+    elenia_data = runtime_data.elenia_data
+    consumption_coordinator = runtime_data.consumption_coordinator
+    market_coordinator = runtime_data.market_coordinator
 
     relay1_hour_sensors = []
     relay2_hour_sensors = []
@@ -82,39 +60,80 @@ async def async_setup_entry(
     for hour in range(24):
         if entry.data[CONF_RELAY_SENSOR_FOR_EACH_HOUR] is True:
             relay1_hour_sensors.append(
-                RelaySensor(coordinator, entry, elenia_data, 1, hour)
+                RelaySensor(market_coordinator, entry, elenia_data, 1, hour)
             )
             relay2_hour_sensors.append(
-                RelaySensor(coordinator, entry, elenia_data, 2, hour)
+                RelaySensor(market_coordinator, entry, elenia_data, 2, hour)
             )
         if entry.data[CONF_PRICE_SENSOR_FOR_EACH_HOUR] is True:
             price_hour_sensors.append(
-                PriceSensor(coordinator, entry, elenia_data, "total", hour)
+                PriceSensor(market_coordinator, entry, elenia_data, "total", hour)
+            )
+
+    cheapest_window_sensors = [
+        CheapestWindowSensor(market_coordinator, entry, elenia_data, window)
+        for window in hass.data[DOMAIN].get(DATA_CHEAPEST_WINDOWS, [])
+    ]
+
+    forecast_sensors = []
+    if entry.data.get(CONF_FORECAST_SENSORS, False) is True:
+        forecast_sensors = [
+            PriceForecastSensor(market_coordinator, entry, elenia_data),
+            RelayForecastSensor(market_coordinator, entry, elenia_data, 1),
+            RelayForecastSensor(market_coordinator, entry, elenia_data, 2),
+        ]
+
+    consumption_sensors = []
+    hourly_meter_sensors = []
+    if runtime_data.hourly_meter_coordinator is not None:
+        # legacy meters have no 5-minute readings to derive these from
+        hourly_meter_sensors = [
+            HourlyMeterSensor(
+                runtime_data.hourly_meter_coordinator, entry, elenia_data, period
             )
+            for period in ("last_hour", "month")
+        ]
+    else:
+        consumption_sensors = [
+            ConsumptionSensor(consumption_coordinator, entry, elenia_data, "a"),
+            ConsumptionSensor(consumption_coordinator, entry, elenia_data, "a1"),
+            ConsumptionSensor(consumption_coordinator, entry, elenia_data, "a2"),
+            ConsumptionSensor(consumption_coordinator, entry, elenia_data, "a3"),
+            DailyConsumptionSensor(consumption_coordinator, entry, elenia_data, "a"),
+            DailyConsumptionSensor(consumption_coordinator, entry, elenia_data, "a1"),
+            DailyConsumptionSensor(consumption_coordinator, entry, elenia_data, "a2"),
+            DailyConsumptionSensor(consumption_coordinator, entry, elenia_data, "a3"),
+            LastHourConsumptionSensor(consumption_coordinator, entry, elenia_data),
+            CostSensor(consumption_coordinator, entry, elenia_data, "today"),
+            CostSensor(consumption_coordinator, entry, elenia_data, "yesterday"),
+            CostSensor(consumption_coordinator, entry, elenia_data, "month"),
+        ]
 
     async_add_entities(
         [
-            ConsumptionSensor(coordinator, entry, elenia_data, "a"),
-            ConsumptionSensor(coordinator, entry, elenia_data, "a1"),
-            ConsumptionSensor(coordinator, entry, elenia_data, "a2"),
-            ConsumptionSensor(coordinator, entry, elenia_data, "a3"),
-            RelaySensor(coordinator, entry, elenia_data, 1),
-            RelaySensor(coordinator, entry, elenia_data, 2),
-            PriceSensor(coordinator, entry, elenia_data, "total"),
-            PriceSensor(coordinator, entry, elenia_data, "prices"),
-            PriceSensor(coordinator, entry, elenia_data, "distribution_prices"),
+            *consumption_sensors,
+            RelaySensor(market_coordinator, entry, elenia_data, 1),
+            RelaySensor(market_coordinator, entry, elenia_data, 2),
+            PriceSensor(market_coordinator, entry, elenia_data, "total"),
+            PriceSensor(market_coordinator, entry, elenia_data, "prices"),
+            PriceSensor(market_coordinator, entry, elenia_data, "distribution_prices"),
             *relay1_hour_sensors,
             *relay2_hour_sensors,
             *price_hour_sensors,
+            *forecast_sensors,
+            *cheapest_window_sensors,
+            *hourly_meter_sensors,
         ],
         False,
     )
 
 
-class PriceSensor(CoordinatorEntity):
+class PriceSensor(SensorEntity, EleniaEntity):
+    _slot_listener = True
+
     def __init__(
         self,
-        coordinator: DataUpdateCoordinator[CoordinatorData],
+        coordinator: MarketCoordinator,
         entry,
         elenia_data,
         price_type: Literal["prices", "distribution_prices", "total"],
@@ -122,30 +141,20 @@ class PriceSensor(CoordinatorEntity):
     ) -> None:
         super().__init__(coordinator)
         self.hour = hour
+        # "now" sensors follow the slot boundary, hour sensors the day rollover
+        self._day_only = hour is not None
         self.price_type = price_type
-        self._name = self.resolve_name(price_type, hour)
         self.entry = entry
         self.elenia_data = elenia_data
         self.coordinator = coordinator
-        self._attr_device_class = SensorDeviceClass.MONETARY
-        self._attr_unit_of_measurement = "cent"
-
-    # for future-proofing unique id, if offets are implemented
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def unique_id(self):
-        return f"elenia_{self.entry.data[CONF_GSRN]}_price_{self.price_type}_{'now' if self.hour is None else f'hour {self.hour}'}"
-
-    @property
-    def state(self):
-        return (
-            (self.resolve_price("prices") + self.resolve_price("distribution_prices"))
-            if self.price_type == "total"
-            else self.resolve_price(self.price_type)
+        self._attr_name = self.resolve_name(price_type, hour)
+        # for future-proofing unique id, if offets are implemented
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_price_{price_type}_"
+            f"{'now' if hour is None else f'hour {hour}'}"
         )
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_native_unit_of_measurement = "cent"
 
     def resolve_name(
         self,
@@ -163,30 +172,31 @@ class PriceSensor(CoordinatorEntity):
             case _:
                 raise Exception(f"Price type not supported, got {price_type}")
 
+    def _update_attrs(self) -> None:
+        self._attr_native_value = self.resolve_price(self.price_type)
+
     def resolve_price(
         self, price_type: Literal["prices", "distribution_prices", "total"]
     ):
-        relay_market_data = self.coordinator.data.relay2_market_data.data
-        today = dt_util.now().strftime("%Y-%m-%d")
-
-        today_prices = next(
-            (
-                t_prices
-                for t_prices in relay_market_data
-                if t_prices.get("day") == today
-            ),
-            None,
-        )
+        data: MarketCoordinatorData | None = self.coordinator.data
+        slot = data.market_slot(self.hour) if data else None
+        if slot is None:
+            return None
+        match price_type:
+            case "prices":
+                return slot.price
+            case "distribution_prices":
+                return slot.distribution_price
+            case "total":
+                return slot.total
 
-        hour = self.hour if self.hour is not None else dt_util.now().hour
-        # _LOGGER.debug(f"Showing price for hour {hour}")
-        return today_prices[price_type][hour]
 
+class RelaySensor(BinarySensorEntity, EleniaEntity):
+    _slot_listener = True
 
-class RelaySensor(BinarySensorEntity, CoordinatorEntity):
     def __init__(
         self,
-        coordinator: DataUpdateCoordinator[CoordinatorData],
+        coordinator: MarketCoordinator,
         entry,
         elenia_data,
         relay_instance: Literal[1, 2],
@@ -195,63 +205,203 @@ class RelaySensor(BinarySensorEntity, CoordinatorEntity):
     ):
         super().__init__(coordinator)
         name_suffix = f"hour {hour}" if hour is not None else "now"
-        self._name = f"Relay {relay_instance} {name_suffix}"
+        self._attr_name = f"Relay {relay_instance} {name_suffix}"
         self.entry = entry
         self.coordinator = coordinator
         self.elenia_data = elenia_data
         self.relay_instance = relay_instance
-        self.relay_market_data = (
-            self.coordinator.data.relay1_market_data.data
-            if relay_instance == 1
-            else self.coordinator.data.relay2_market_data.data
-        )
         self.hour = hour
+        self._day_only = hour is not None
         # for future-proofing unique id, if offets are implemented
         self.day_offset = day_offset
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_relay_{relay_instance}_hour_"
+            f"{hour if hour is not None else 'current'}_{day_offset}"
+        )
+
+    def _update_attrs(self) -> None:
+        self._attr_is_on = self.is_relay_enabled()
+
+    def is_relay_enabled(self):
+        data: MarketCoordinatorData | None = self.coordinator.data
+        slot = data.market_slot(self.hour) if data else None
+        if slot is None:
+            _LOGGER.debug(
+                f"Couldn't find market data for today for relay {self.relay_instance}"
+            )
+            return None
+        return slot.relay1_on if self.relay_instance == 1 else slot.relay2_on
+
+
+class ForecastMixin:
+    """Today's and tomorrow's market slots as list attributes.
+
+    The lists are rebuilt only when the market data or the day changes, and
+    are left out of the recorder. Sensors using it define forecast_slot,
+    which turns one slot into a list item.
+    """
+
+    _slot_listener = True
+    _unrecorded_attributes = frozenset({"today", "tomorrow"})
+    _forecast_key: tuple[int, date] | None = None
+    forecast_slot: Callable[[datetime, MarketSlot], dict]
+
+    def forecast_attributes(self, data: MarketCoordinatorData | None) -> dict:
+        if data is None:
+            self._forecast_key = None
+            self._attr_extra_state_attributes = {"today": [], "tomorrow": []}
+            return self._attr_extra_state_attributes
+        today = dt_util.now().date()
+        key = (id(data.market_index), today)
+        if key != self._forecast_key:
+            self._forecast_key = key
+            self._attr_extra_state_attributes = {
+                "today": self.forecast_day(data, today),
+                "tomorrow": self.forecast_day(data, today + timedelta(days=1)),
+            }
+        return self._attr_extra_state_attributes
+
+    def forecast_day(self, data: MarketCoordinatorData, day: date) -> list[dict]:
+        day_slots = data.day_slots(day)
+        if day_slots is None:
+            return []
+        return [
+            self.forecast_slot(
+                datetime.fromtimestamp(start, dt_util.DEFAULT_TIME_ZONE), slot
+            )
+            for start, slot in day_slots.items()
+        ]
 
-    @property
-    def name(self):
-        return self._name
 
-    @property
-    def unique_id(self):
-        return f"elenia_{self.entry.data[CONF_GSRN]}_relay_{self.relay_instance}_hour_{self.hour if self.hour is not None else 'current'}_{self.day_offset}"
+class PriceForecastSensor(ForecastMixin, SensorEntity, EleniaEntity):
+    """Current total price, with the hourly prices of today and tomorrow."""
+
+    def __init__(self, coordinator: MarketCoordinator, entry, elenia_data) -> None:
+        super().__init__(coordinator)
+        self.entry = entry
+        self.elenia_data = elenia_data
+        self._attr_name = "Price forecast"
+        self._attr_unique_id = f"elenia_{entry.data[CONF_GSRN]}_price_forecast"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_native_unit_of_measurement = "cent"
+
+    def forecast_slot(self, start: datetime, slot: MarketSlot) -> dict:
+        return {
+            "start": start.isoformat(),
+            "price": slot.price,
+            "distribution_price": slot.distribution_price,
+            "total": slot.total,
+        }
 
-    @property
-    def is_on(self):
-        return self.is_relay_enabled()
+    def _update_attrs(self) -> None:
+        data: MarketCoordinatorData = self.coordinator.data
+        self.forecast_attributes(data)
+        slot = data.market_slot() if data else None
+        self._attr_native_value = slot.total if slot else None
 
-    def is_relay_enabled(self):
-        day = dt_util.now().strftime("%Y-%m-%d")
-        hour = self.hour or dt_util.now().hour
 
-        _LOGGER.debug(
-            f"Looking for relay info for day: {day}, hour: {hour} for relay {self.relay_instance}"
-        )
+class RelayForecastSensor(ForecastMixin, BinarySensorEntity, EleniaEntity):
+    """Current relay state, with the hourly relay plan of today and tomorrow."""
 
-        market_data_for_today = next(
-            (rd for rd in self.relay_market_data if rd.get("day") == day), None
+    def __init__(
+        self,
+        coordinator: MarketCoordinator,
+        entry,
+        elenia_data,
+        relay_instance: Literal[1, 2],
+    ):
+        super().__init__(coordinator)
+        self.entry = entry
+        self.elenia_data = elenia_data
+        self.relay_instance = relay_instance
+        self._attr_name = f"Relay {relay_instance} forecast"
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_relay_{relay_instance}_forecast"
         )
 
-        if not market_data_for_today:
-            _LOGGER.debug(
-                f"Couldn't find market data for today for relay {self.relay_instance}"
+    def forecast_slot(self, start: datetime, slot: MarketSlot) -> dict:
+        return {
+            "start": start.isoformat(),
+            "on": slot.relay1_on if self.relay_instance == 1 else slot.relay2_on,
+        }
+
+    def _update_attrs(self) -> None:
+        data: MarketCoordinatorData = self.coordinator.data
+        self.forecast_attributes(data)
+        slot = data.market_slot() if data else None
+        if slot is None:
+            self._attr_is_on = None
+        else:
+            self._attr_is_on = (
+                slot.relay1_on if self.relay_instance == 1 else slot.relay2_on
             )
-            return None
-        if not market_data_for_today.get("hours_on"):
-            _LOGGER.debug("No hours_on-attribute on today's market data")
-            return None
 
-        is_toggled = hour in market_data_for_today.get("hours_on")
-        _LOGGER.debug(f"Relay state found: {is_toggled}")
 
-        return is_toggled
+class CheapestWindowSensor(BinarySensorEntity, EleniaEntity):
+    """On during the cheapest slots found for a configured load.
 
+    Searched once per deadline period, or after the window when there is no
+    deadline, and again when prices change. A window that has already started
+    is kept until it ends.
+    """
 
-class ConsumptionSensor(CoordinatorEntity):
+    _slot_listener = True
+    _unrecorded_attributes = frozenset({"slots"})
+
+    def __init__(
+        self, coordinator: MarketCoordinator, entry, elenia_data, window: dict
+    ):
+        super().__init__(coordinator)
+        self.entry = entry
+        self.elenia_data = elenia_data
+        self.window = window
+        self.result: CheapestSlots | None = None
+        # the deadline and the market data the result was searched for
+        self._deadline: datetime | None = None
+        self._market_data: tuple | None = None
+        self._attr_name = window[CONF_NAME]
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_cheapest_{slugify(window[CONF_NAME])}"
+        )
+
+    def _should_search(self, data: MarketCoordinatorData, timestamp: float) -> bool:
+        if self.result is None:
+            return True
+        if self.result.start <= timestamp < self.result.end:
+            return False
+        if (data.relay1_market_data, data.relay2_market_data) != self._market_data:
+            return True
+        if self._deadline is None:
+            return timestamp >= self.result.end
+        return timestamp >= self._deadline.timestamp()
+
+    def _update_attrs(self) -> None:
+        now = dt_util.now()
+        timestamp = now.timestamp()
+        data: MarketCoordinatorData | None = self.coordinator.data
+        if data is not None and self._should_search(data, timestamp):
+            deadline = self.window.get(CONF_DEADLINE)
+            self._deadline = next_deadline(now, deadline) if deadline else None
+            self._market_data = (data.relay1_market_data, data.relay2_market_data)
+            self.result = find_cheapest(
+                data.market_index,
+                self.window[CONF_DURATION],
+                self.window[CONF_CONTIGUOUS],
+                self._deadline,
+                now,
+            )
+        if self.result is None:
+            self._attr_is_on = False
+            self._attr_extra_state_attributes = {}
+            return
+        self._attr_is_on = self.result.contains(timestamp)
+        self._attr_extra_state_attributes = self.result.as_dict()
+
+
+class ConsumptionSensor(SensorEntity, EleniaEntity):
     def __init__(
         self,
-        coordinator,
+        coordinator: ConsumptionCoordinator,
         entry,
         elenia_data,
         measurement_attribute: Literal["a", "a1", "a2", "a3"],
@@ -260,11 +410,13 @@ class ConsumptionSensor(CoordinatorEntity):
         self.entry = entry
         self.elenia_data = elenia_data
         self.measurement_attribute = measurement_attribute
-        self._name = self.get_name(measurement_attribute)
-        self._unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-        self._latest_measurement_time = None
-        self._latest_measurement = None
+        self._attr_name = self.get_name(measurement_attribute)
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_{measurement_attribute}"
+        )
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_device_info = self.resolve_device_info()
 
     def get_name(self, measurement_attribute: Literal["a", "a1", "a2", "a3"]):
         match measurement_attribute:
@@ -277,79 +429,41 @@ class ConsumptionSensor(CoordinatorEntity):
             case "a3":
                 return "Electric consumption phase 3"
 
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def unique_id(self):
-        return f"elenia_{self.entry.data[CONF_GSRN]}_{self.measurement_attribute}"
-
-    @property
-    def state(self):
-        data: Measurements = self.coordinator.data.consumption_data
-        if data:
-            try:
-                latest_measurement = data[-1]
-                latest_time_str = latest_measurement.get("dt")
-                entry_time = (
-                    datetime.strptime(latest_time_str, "%Y-%m-%dT%H:%M:%S").replace(
-                        tzinfo=timezone.utc
-                    )
-                    if latest_time_str
-                    else None
-                )
-
-                self._latest_measurement_time = entry_time
-                self._latest_measurement = latest_measurement
-
-                _LOGGER.debug("Latest data timestamp: %s", entry_time)
-                raw_value = latest_measurement.get(self.measurement_attribute)
-                if raw_value is None:
-                    _LOGGER.error("Could not get latest measurement")
-                    return None
-
-                value = int(raw_value) / 1000
-                if value is not None:
-                    return value
-                else:
-                    _LOGGER.error("Could not parse latest measurement")
-                    return None
-
-            except Exception as e:
-                _LOGGER.error("Error processing data: %s", str(e))
-                return None
-        return None
-
-    @property
-    def unit_of_measurement(self):
-        return self._unit_of_measurement
-
-    @property
-    def extra_state_attributes(self):
-        attrs = {
+    def _update_attrs(self) -> None:
+        data: ConsumptionCoordinatorData = self.coordinator.data
+        latest_measurement = data.readings.latest if data else None
+        attrs = self.base_attributes()
+        self._attr_extra_state_attributes = attrs
+        if latest_measurement is None:
+            self._attr_native_value = None
+            return
+        latest_dt = latest_measurement.get("dt")
+        try:
+            if latest_dt:
+                entry_time = parse_slot_end(latest_dt)
+                attrs["latest_measurement_time"] = entry_time.isoformat()
+            raw_value = latest_measurement.get(self.measurement_attribute)
+            if raw_value is None:
+                _LOGGER.error("Could not get latest measurement")
+                self._attr_native_value = None
+            else:
+                self._attr_native_value = int(raw_value) / 1000
+        except Exception as e:
+            _LOGGER.error("Error processing data: %s", str(e))
+            self._attr_native_value = None
+
+    def base_attributes(self) -> dict:
+        return {
             "customer_id": self.entry.data[CONF_CUSTOMER_ID],
             "gsrn": self.entry.data[CONF_GSRN],
         }
-        if self._latest_measurement:
-            attrs["latest_measurement_time"] = self._latest_measurement
-        if self._latest_measurement_time:
-            attrs["latest_measurement_time"] = self._latest_measurement_time.isoformat()
-        return attrs
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        customer_id = self.entry.data[CONF_CUSTOMER_ID]
+
+    def resolve_device_info(self) -> DeviceInfo:
         gsrn = self.entry.data[CONF_GSRN]
-        meteringpoints = self.elenia_data.customer_data.get(customer_id, {}).get(
-            "meteringpoints", []
-        )
-        meteringpoint = next(
-            (mp for mp in meteringpoints if mp.get("gsrn") == gsrn), None
-        )
+        meteringpoint = self.elenia_data.meteringpoint or {}
         product_description = meteringpoint.get("productcode_description", "")
         default_manufacturer = f"Elenia, {product_description}"
-        default_model = meteringpoint.get("device").get("name")
+        default_model = (meteringpoint.get("device") or {}).get("name")
 
         return DeviceInfo(
             connections={(CONNECTION_NETWORK_MAC, format_mac(gsrn))},
@@ -359,3 +473,193 @@ class ConsumptionSensor(CoordinatorEntity):
             identifiers={(DOMAIN, gsrn)},
             via_device=(DOMAIN, format_mac(gsrn)),
         )
+
+
+class DayRolloverMixin:
+    """Re-evaluates the state at local midnight, even before new slots arrive."""
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_change(
+                self.hass, self._handle_midnight, hour=0, minute=0, second=0
+            )
+        )
+
+    @callback
+    def _handle_midnight(self, now: datetime) -> None:
+        self.async_write_ha_state_if_changed()
+
+
+class DailyConsumptionSensor(DayRolloverMixin, ConsumptionSensor):
+    """Today's consumption, derived from the cumulative readings.
+
+    The hourly breakdown of today and yesterday's total are attributes.
+    """
+
+    _unrecorded_attributes = frozenset({"hourly"})
+
+    def __init__(
+        self,
+        coordinator: ConsumptionCoordinator,
+        entry,
+        elenia_data,
+        measurement_attribute: Literal["a", "a1", "a2", "a3"],
+    ):
+        super().__init__(coordinator, entry, elenia_data, measurement_attribute)
+        self._attr_name = f"{self.get_name(measurement_attribute)} today"
+        self._attr_unique_id = (
+            f"elenia_{entry.data[CONF_GSRN]}_{measurement_attribute}_today"
+        )
+
+    def _update_attrs(self) -> None:
+        data: ConsumptionCoordinatorData = self.coordinator.data
+        today = dt_util.now().date()
+        attrs = self.base_attributes()
+        self._attr_extra_state_attributes = attrs
+        if data is None:
+            self._attr_native_value = None
+            return
+        today_deltas = data.deltas.get(today)
+        yesterday_deltas = data.deltas.get(today - timedelta(days=1))
+        attribute = self.measurement_attribute
+        self._attr_native_value = (
+            today_deltas.total(attribute) if today_deltas else None
+        )
+        attrs["yesterday"] = (
+            yesterday_deltas.total(attribute) if yesterday_deltas else None
+        )
+        if today_deltas:
+            attrs["gaps"] = today_deltas.gaps
+            attrs["resets"] = today_deltas.resets
+        hourly = today_deltas.hourly.get(attribute, {}) if today_deltas else {}
+        attrs["hourly"] = [
+            {
+                "start": dt_util.as_local(
+                    datetime.fromtimestamp(hour, timezone.utc)
+                ).isoformat(),
+                "consumption": round(value, 3),
+            }
+            for hour, value in sorted(hourly.items())
+        ]
+
+
+class LastHourConsumptionSensor(ConsumptionSensor):
+    """Total consumption of the latest hour whose readings are all in."""
+
+    def __init__(self, coordinator: ConsumptionCoordinator, entry, elenia_data):
+        super().__init__(coordinator, entry, elenia_data, "a")
+        self._attr_name = "Electric consumption last hour"
+        self._attr_unique_id = f"elenia_{entry.data[CONF_GSRN]}_a_last_hour"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    def _update_attrs(self) -> None:
+        data: ConsumptionCoordinatorData = self.coordinator.data
+        attrs = self.base_attributes()
+        self._attr_extra_state_attributes = attrs
+        self._attr_native_value = None
+        latest = data.readings.latest if data else None
+        if latest is None:
+            return
+        latest_end = parse_slot_end(latest["dt"])
+        hour_start = latest_end.replace(minute=0, second=0) - timedelta(hours=1)
+        day_deltas = data.deltas.get(dt_util.as_local(hour_start).date())
+        if day_deltas is None:
+            return
+        value = day_deltas.hourly.get("a", {}).get(int(hour_start.timestamp()))
+        if value is not None:
+            self._attr_native_value = round(value, 3)
+            attrs["start"] = dt_util.as_local(hour_start).isoformat()
+
+
+class CostSensor(DayRolloverMixin, ConsumptionSensor):
+    """Electricity cost at total price (spot + distribution), in euros."""
+
+    def __init__(
+        self,
+        coordinator: ConsumptionCoordinator,
+        entry,
+        elenia_data,
+        period: Literal["today", "yesterday", "month"],
+    ):
+        super().__init__(coordinator, entry, elenia_data, "a")
+        self.period = period
+        match period:
+            case "today":
+                self._attr_name = "Electricity cost today"
+                self._attr_state_class = SensorStateClass.TOTAL
+            case "yesterday":
+                self._attr_name = "Electricity cost yesterday"
+                self._attr_state_class = None
+            case "month":
+                self._attr_name = "Electricity cost this month"
+                self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_unique_id = f"elenia_{entry.data[CONF_GSRN]}_cost_{period}"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_native_unit_of_measurement = CURRENCY_EURO
+
+    def _update_attrs(self) -> None:
+        data: ConsumptionCoordinatorData = self.coordinator.data
+        self._attr_extra_state_attributes = self.base_attributes()
+        if data is None:
+            self._attr_native_value = None
+            return
+        today = dt_util.now().date()
+        match self.period:
+            case "today":
+                self._attr_native_value = data.costs.total(today)
+                self._attr_last_reset = dt_util.start_of_local_day(today)
+            case "yesterday":
+                self._attr_native_value = data.costs.total(today - timedelta(days=1))
+            case "month":
+                self._attr_native_value = data.costs.month_to_date(today)
+                self._attr_last_reset = dt_util.start_of_local_day(
+                    today.replace(day=1)
+                )
+
+
+class HourlyMeterSensor(DayRolloverMixin, ConsumptionSensor):
+    """Consumption from the hourly readings of a legacy metering point.
+
+    The month sensor starts over at local midnight on the first of the
+    month, even though the new month's readings come in later.
+    """
+
+    def __init__(
+        self,
+        coordinator: HourlyMeterCoordinator,
+        entry,
+        elenia_data,
+        period: Literal["last_hour", "month"],
+    ):
+        super().__init__(coordinator, entry, elenia_data, "a")
+        self.period = period
+        match period:
+            case "last_hour":
+                self._attr_name = "Electric consumption latest hour (hourly meter)"
+                self._attr_state_class = SensorStateClass.MEASUREMENT
+            case "month":
+                self._attr_name = "Electric consumption this month (hourly meter)"
+                self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_unique_id = f"elenia_{entry.data[CONF_GSRN]}_hourly_{period}"
+
+    def _update_attrs(self) -> None:
+        data: HourlyMeterCoordinatorData = self.coordinator.data
+        attrs = self.base_attributes()
+        self._attr_extra_state_attributes = attrs
+        self._attr_native_value = None
+        today = dt_util.now().date()
+        if self.period == "month":
+            self._attr_last_reset = dt_util.start_of_local_day(today.replace(day=1))
+        if data is None:
+            return
+        match self.period:
+            case "last_hour":
+                latest = data.readings.latest
+                if latest is not None:
+                    start, value = latest
+                    self._attr_native_value = round(value, 3)
+                    attrs["start"] = start.isoformat()
+            case "month":
+                if data.readings.year == today.year:
+                    self._attr_native_value = data.readings.month_total(today.month)
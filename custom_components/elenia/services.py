@@ -0,0 +1,143 @@
+import asyncio
+from datetime import date, timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BACKFILL_MAX_DAYS,
+    BACKFILL_MAX_PARALLEL_DAYS,
+    CONF_CONTIGUOUS,
+    CONF_DEADLINE,
+    CONF_DURATION,
+    DOMAIN,
+)
+from .coordinator import EleniaRuntimeData
+from .optimizer import find_cheapest
+from .request import UNCHANGED
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL_STATISTICS = "backfill_statistics"
+SERVICE_FIND_CHEAPEST_WINDOW = "find_cheapest_window"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+ATTR_GSRN = "gsrn"
+
+BACKFILL_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Required(ATTR_END_DATE): cv.date,
+        vol.Optional(ATTR_GSRN): cv.string,
+    }
+)
+
+FIND_CHEAPEST_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DURATION): cv.positive_time_period,
+        vol.Optional(CONF_CONTIGUOUS, default=True): cv.boolean,
+        vol.Optional(CONF_DEADLINE): cv.datetime,
+        vol.Optional(ATTR_GSRN): cv.string,
+    }
+)
+
+
+def _runtime_datas(hass: HomeAssistant, gsrn: str | None) -> list[EleniaRuntimeData]:
+    runtime_datas = [
+        runtime_data
+        for runtime_data in hass.data.get(DOMAIN, {}).values()
+        if isinstance(runtime_data, EleniaRuntimeData)
+        and (gsrn is None or runtime_data.elenia_data.gsrn == gsrn)
+    ]
+    if not runtime_datas:
+        raise HomeAssistantError(f"No Elenia metering point found for {gsrn}")
+    return runtime_datas
+
+
+async def async_backfill_statistics(
+    runtime_data: EleniaRuntimeData, start_date: date, end_date: date
+):
+    """Fetch each day in the range and import it as hourly statistics."""
+    elenia_data = runtime_data.elenia_data
+    importer = runtime_data.consumption_coordinator.statistics
+    semaphore = asyncio.Semaphore(BACKFILL_MAX_PARALLEL_DAYS)
+
+    async def backfill_day(day: date):
+        async with semaphore:
+            measurements = await elenia_data.fetch_5min_readings(day)
+        if measurements is None or measurements is UNCHANGED:
+            _LOGGER.warning("Failed to fetch readings for %s, skipping", day)
+            return
+        importer.import_measurements(measurements)
+
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+    await elenia_data.fetch_customer_data_and_token()
+    await asyncio.gather(*(backfill_day(day) for day in days))
+    _LOGGER.debug(
+        "Backfilled statistics for %s from %s to %s",
+        elenia_data.gsrn,
+        start_date,
+        end_date,
+    )
+
+
+def async_setup_services(hass: HomeAssistant):
+    async def handle_backfill_statistics(call: ServiceCall):
+        start_date: date = call.data[ATTR_START_DATE]
+        end_date: date = call.data[ATTR_END_DATE]
+        if end_date < start_date:
+            raise HomeAssistantError("end_date must not be before start_date")
+        if (end_date - start_date).days >= BACKFILL_MAX_DAYS:
+            raise HomeAssistantError(
+                f"Backfill is limited to {BACKFILL_MAX_DAYS} days at a time"
+            )
+        for runtime_data in _runtime_datas(hass, call.data.get(ATTR_GSRN)):
+            await async_backfill_statistics(runtime_data, start_date, end_date)
+
+    async def handle_find_cheapest_window(call: ServiceCall) -> ServiceResponse:
+        deadline = call.data.get(CONF_DEADLINE)
+        if deadline is not None and deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        results = {}
+        for runtime_data in _runtime_datas(hass, call.data.get(ATTR_GSRN)):
+            market_data = runtime_data.market_coordinator.data
+            result = (
+                find_cheapest(
+                    market_data.market_index,
+                    call.data[CONF_DURATION],
+                    call.data[CONF_CONTIGUOUS],
+                    deadline,
+                )
+                if market_data
+                else None
+            )
+            gsrn = runtime_data.elenia_data.gsrn
+            results[gsrn] = result.as_dict() if result else None
+        return {"metering_points": results}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL_STATISTICS,
+        handle_backfill_statistics,
+        schema=BACKFILL_STATISTICS_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        handle_find_cheapest_window,
+        schema=FIND_CHEAPEST_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,146 @@
+from datetime import datetime
+import logging
+from typing import Literal
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .readings import SLOT_LENGTH, ReadingBuffer, local_day_of, parse_slot_end
+from .types import Measurements
+
+_LOGGER = logging.getLogger(__name__)
+
+MeasurementAttribute = Literal["a", "a1", "a2", "a3"]
+STATISTIC_ATTRIBUTES: tuple[MeasurementAttribute, ...] = ("a", "a1", "a2", "a3")
+STATISTIC_NAMES = {
+    "a": "Electric consumption total",
+    "a1": "Electric consumption phase 1",
+    "a2": "Electric consumption phase 2",
+    "a3": "Electric consumption phase 3",
+}
+
+
+COST_STATISTIC = "cost"
+
+
+def statistic_id(gsrn: str, attribute: MeasurementAttribute | str) -> str:
+    return f"{DOMAIN}:{gsrn}_{attribute}"
+
+
+def hour_start_of(dt: str) -> datetime:
+    """UTC start of the hour a slot belongs to."""
+    return (parse_slot_end(dt) - SLOT_LENGTH).replace(minute=0, second=0)
+
+
+def hourly_statistics(
+    measurements: Measurements,
+    attribute: MeasurementAttribute,
+    hours: set[datetime] | None = None,
+) -> list[StatisticData]:
+    """Turn cumulative 5-minute readings into hourly sum statistics.
+
+    Each hour gets the reading of its latest slot, so an hour that is still
+    filling in is overwritten once the rest of its slots arrive.
+    """
+    latest: dict[datetime, tuple[str, int]] = {}
+    for measurement in measurements:
+        dt = measurement["dt"]
+        value = measurement.get(attribute)
+        if value is None:
+            continue
+        start = hour_start_of(dt)
+        if hours is not None and start not in hours:
+            continue
+        if start not in latest or latest[start][0] < dt:
+            latest[start] = (dt, value)
+
+    statistics = []
+    for start in sorted(latest):
+        value = int(latest[start][1]) / 1000
+        statistics.append(StatisticData(start=start, state=value, sum=value))
+    return statistics
+
+
+class StatisticsImporter:
+    """Imports meter readings as external hourly statistics for a, a1, a2, a3."""
+
+    def __init__(self, hass: HomeAssistant, gsrn: str):
+        self.hass = hass
+        self.gsrn = gsrn
+
+    def metadata(self, attribute: MeasurementAttribute) -> StatisticMetaData:
+        return StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"Elenia {STATISTIC_NAMES[attribute]} {self.gsrn}",
+            source=DOMAIN,
+            statistic_id=statistic_id(self.gsrn, attribute),
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+
+    def import_measurements(
+        self, measurements: Measurements, hours: set[datetime] | None = None
+    ) -> int:
+        """Queue one insert per attribute. Re-importing an hour overwrites it."""
+        imported = 0
+        for attribute in STATISTIC_ATTRIBUTES:
+            statistics = hourly_statistics(measurements, attribute, hours)
+            if statistics:
+                async_add_external_statistics(
+                    self.hass, self.metadata(attribute), statistics
+                )
+                imported = max(imported, len(statistics))
+        return imported
+
+    def import_changed(self, changed: Measurements, readings: ReadingBuffer):
+        """Recompute only the hours touched by new or revised slots."""
+        if not changed:
+            return
+        hours = {hour_start_of(measurement["dt"]) for measurement in changed}
+        days = {local_day_of(measurement["dt"]) for measurement in changed}
+        for day in sorted(days):
+            imported = self.import_measurements(readings.day(day), hours)
+            _LOGGER.debug("Imported %s hourly statistics for %s", imported, day)
+
+    def import_hourly_sums(
+        self,
+        attribute: MeasurementAttribute,
+        hourly_sums: list[tuple[datetime, float, float]],
+    ):
+        """Import (hour start, kWh, cumulative kWh) rows, e.g. of a legacy meter."""
+        if not hourly_sums:
+            return
+        async_add_external_statistics(
+            self.hass,
+            self.metadata(attribute),
+            [
+                StatisticData(start=start, state=value, sum=running)
+                for start, value, running in hourly_sums
+            ],
+        )
+
+    def cost_metadata(self) -> StatisticMetaData:
+        return StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"Elenia electricity cost {self.gsrn}",
+            source=DOMAIN,
+            statistic_id=statistic_id(self.gsrn, COST_STATISTIC),
+            unit_of_measurement=CURRENCY_EURO,
+        )
+
+    def import_costs(self, hourly_sums: list[tuple[datetime, float, float]]):
+        """Import (hour start, cost, cumulative sum) rows as cost statistics."""
+        if not hourly_sums:
+            return
+        async_add_external_statistics(
+            self.hass,
+            self.cost_metadata(),
+            [
+                StatisticData(start=start, state=cost, sum=running)
+                for start, cost, running in hourly_sums
+            ],
+        )
@@ -1,7 +1,18 @@
-from datetime import date
-from typing import Union, Optional, Literal, TypedDict
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Union, Optional, Literal, TypedDict
 from dataclasses import dataclass, field
 
+from homeassistant.util import dt as dt_util
+
+# market time units Elenia may use: quarter-hour and hourly
+SLOT_SECONDS = (15 * 60, 60 * 60)
+# prices per day: 23, 24 or 25 hours in hourly or quarter-hour slots
+SLOT_COUNTS = {
+    hours * 3600 // seconds for hours in (23, 24, 25) for seconds in SLOT_SECONDS
+}
+
 
 class Measurement(TypedDict):
     a: int  # 99220, phases combined
@@ -39,8 +50,8 @@ class RelayCalendar:
     hours_on: list[int] = field(default_factory=list)
 
     def __post_init__(self):
-        if len(self.hours_on) != 24:
-            raise ValueError("hours_on must be a list of exactly 24 integers.")
+        if len(self.hours_on) not in (23, 24, 25):
+            raise ValueError("hours_on must have one element for each hour of a day.")
         if any(hour not in (0, 1) for hour in self.hours_on):
             raise ValueError("Each element in hours_on must be either 0 or 1.")
 
@@ -102,14 +113,18 @@ class RelayMarketData:
     prices: list[float] = field(default_factory=list)
 
     def __post_init__(self):
-        if len(self.distribution_prices) != 24:
-            raise ValueError("distribution_prices must contain exactly 24 elements.")
-        if len(self.prices) != 24:
-            raise ValueError("prices must contain exactly 24 elements.")
+        if len(self.prices) not in SLOT_COUNTS:
+            raise ValueError(
+                "prices must have one element for each 15 or 60 minute slot of a day."
+            )
+        if len(self.distribution_prices) != len(self.prices):
+            raise ValueError("distribution_prices must be as long as prices.")
+        # rejects e.g. 96 quarter-hour prices on a 25 hour day
+        _slot_starts(date.fromisoformat(str(self.day)), len(self.prices))
 
-        if any(hour < 0 or hour > 23 for hour in self.hours_on):
+        if any(hour < 0 or hour > 24 for hour in self.hours_on):
             raise ValueError(
-                "Each element in hours_on must be between 0 and 23 inclusive."
+                "Each element in hours_on must be between 0 and 24 inclusive."
             )
 
 
@@ -134,3 +149,185 @@ class RelayMarketDataList:
                 )
             )
         return cls(data=items)
+
+
+@dataclass
+class MarketSlot:
+    price: float
+    distribution_price: float
+    total: float
+    relay1_on: Optional[bool]
+    relay2_on: Optional[bool]
+    # position of the slot's hour in Elenia's hours_on
+    hour: int
+
+
+def _hour_average(slots: list[MarketSlot]) -> MarketSlot:
+    """Average the prices of an hour's slots; relay states are set per hour."""
+    if len(slots) == 1:
+        return slots[0]
+    count = len(slots)
+    price = round(sum(slot.price for slot in slots) / count, 6)
+    distribution_price = round(
+        sum(slot.distribution_price for slot in slots) / count, 6
+    )
+    return MarketSlot(
+        price=price,
+        distribution_price=distribution_price,
+        total=round(price + distribution_price, 6),
+        relay1_on=slots[0].relay1_on,
+        relay2_on=slots[0].relay2_on,
+        hour=slots[0].hour,
+    )
+
+
+class DaySlots:
+    """The market slots of one local day, indexed by their start time.
+
+    Slots are 15 or 60 minutes long and a day has 23, 24 or 25 hours, so
+    lookups go through the precomputed start times instead of the wall-clock
+    hour. Finding a slot is a bisect, whatever the number of slots.
+    """
+
+    __slots__ = ("day_start", "slot_seconds", "starts", "slots", "valid", "_by_hour")
+
+    def __init__(
+        self,
+        day_start: int,
+        slot_seconds: int,
+        starts: list[int],
+        slots: list,
+        valid: bool = True,
+    ):
+        self.day_start = day_start
+        self.slot_seconds = slot_seconds
+        self.starts = array("q", starts)
+        self.slots: list[MarketSlot] = slots
+        # False while Elenia reports the day's entry as anything but "valid"
+        self.valid = valid
+        # the slots of each of Elenia's hours, keyed by its position in hours_on
+        hours: dict[int, list[tuple[int, MarketSlot]]] = {}
+        for start, slot in zip(starts, slots):
+            hours.setdefault(slot.hour, []).append((start, slot))
+        # local wall-clock hour -> that hour's slot, for the per-hour entities;
+        # the first of the two hours repeated by the autumn transition
+        self._by_hour: dict[int, MarketSlot] = {}
+        for hour_slots in hours.values():
+            start = hour_slots[0][0]
+            hour = datetime.fromtimestamp(start, dt_util.DEFAULT_TIME_ZONE).hour
+            if hour not in self._by_hour:
+                self._by_hour[hour] = _hour_average([slot for _, slot in hour_slots])
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def slot_minutes(self) -> int:
+        return self.slot_seconds // 60
+
+    def at(self, timestamp: float) -> Optional[MarketSlot]:
+        i = bisect_right(self.starts, timestamp) - 1
+        if i < 0 or timestamp >= self.starts[i] + self.slot_seconds:
+            return None
+        return self.slots[i]
+
+    def at_hour(self, hour: int) -> Optional[MarketSlot]:
+        """The slot of a local hour; on quarter-hour days the average of its
+        quarters, which are available through `at` and `items`."""
+        return self._by_hour.get(hour)
+
+    def items(self) -> Iterator[tuple[int, MarketSlot]]:
+        return zip(self.starts, self.slots)
+
+
+# local date ("YYYY-MM-DD") -> that day's slots
+MarketIndex = dict[str, DaySlots]
+
+
+def _hours_on_by_day(
+    market_data: Optional[RelayMarketDataList],
+) -> dict[str, Optional[set[int]]]:
+    if market_data is None:
+        return {}
+    return {
+        str(item.day): set(item.hours_on) if item.hours_on else None
+        for item in market_data.data
+    }
+
+
+def _slot_starts(day: date, count: int) -> tuple[int, int, list[Optional[int]]]:
+    """Day start, slot length and start time of each of a day's `count` prices.
+
+    A start is None for a price that has no slot of its own. Raises ValueError
+    when the count fits neither the day's slots nor its 24 wall-clock hours.
+    """
+    start = int(dt_util.start_of_local_day(day).timestamp())
+    next_day_start = dt_util.start_of_local_day(day + timedelta(days=1))
+    day_seconds = int(next_day_start.timestamp()) - start
+    if day_seconds % count == 0 and day_seconds // count in SLOT_SECONDS:
+        slot_seconds = day_seconds // count
+        return start, slot_seconds, [start + i * slot_seconds for i in range(count)]
+    if count != 24:
+        raise ValueError(f"{count} prices do not fit the slots of {day}")
+    # 24 hourly prices on a 23 or 25 hour day: map them to wall-clock hours
+    starts: list[Optional[int]] = []
+    for hour in range(count):
+        if hour > 23:
+            starts.append(None)
+            continue
+        local = datetime.combine(day, time(hour), tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        hour_start = int(local.timestamp())
+        exists = dt_util.as_local(dt_util.utc_from_timestamp(hour_start)).hour == hour
+        # the hour skipped by the spring transition has no slot
+        starts.append(hour_start if exists else None)
+    return start, 3600, starts
+
+
+def build_market_index(
+    relay1_market_data: Optional[RelayMarketDataList],
+    relay2_market_data: Optional[RelayMarketDataList],
+) -> MarketIndex:
+    """Index prices and relay states by local day and slot start.
+
+    Prices are taken from relay 2 market data, falling back to relay 1 for
+    days only present there. Relay state is None when the day has no plan.
+    """
+    price_days: dict[str, RelayMarketData] = {}
+    for market_data in (relay1_market_data, relay2_market_data):
+        if market_data is not None:
+            price_days.update((str(item.day), item) for item in market_data.data)
+
+    relay1_hours_on = _hours_on_by_day(relay1_market_data)
+    relay2_hours_on = _hours_on_by_day(relay2_market_data)
+
+    index: MarketIndex = {}
+    for day, item in price_days.items():
+        relay1_day = relay1_hours_on.get(day)
+        relay2_day = relay2_hours_on.get(day)
+        day_start, slot_seconds, starts = _slot_starts(
+            date.fromisoformat(day), len(item.prices)
+        )
+        slot_starts = []
+        slots = []
+        for i, (start, price, distribution_price) in enumerate(
+            zip(starts, item.prices, item.distribution_prices)
+        ):
+            if start is None:
+                continue
+            slot_starts.append(start)
+            # hours_on counts the day's hours in the order Elenia lists them
+            hour = i * slot_seconds // 3600
+            slots.append(
+                MarketSlot(
+                    price=price,
+                    distribution_price=distribution_price,
+                    total=price + distribution_price,
+                    relay1_on=None if relay1_day is None else hour in relay1_day,
+                    relay2_on=None if relay2_day is None else hour in relay2_day,
+                    hour=hour,
+                )
+            )
+        index[day] = DaySlots(
+            day_start, slot_seconds, slot_starts, slots, item.status == "valid"
+        )
+    return index
@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, WEBSOCKET_MAX_DAYS
+from .coordinator import EleniaRuntimeData
+from .statistics import STATISTIC_ATTRIBUTES
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant):
+    websocket_api.async_register_command(hass, websocket_day_series)
+
+
+def _runtime_data(hass: HomeAssistant, gsrn: str) -> EleniaRuntimeData | None:
+    return next(
+        (
+            runtime_data
+            for runtime_data in hass.data.get(DOMAIN, {}).values()
+            if isinstance(runtime_data, EleniaRuntimeData)
+            and runtime_data.elenia_data.gsrn == gsrn
+        ),
+        None,
+    )
+
+
+def day_series(runtime_data: EleniaRuntimeData, day: date) -> dict:
+    """One day of cached readings, prices and relay plans as columnar arrays.
+
+    Times are epoch seconds: slot ends for readings, slot starts for prices.
+    A relay's hours_on lists hours by their position in Elenia's hours_on,
+    and is None when there is no plan for the day.
+    """
+    series = runtime_data.consumption_coordinator.readings.days.get(day)
+    reading_columns: dict[str, list] = {"t": series.t.tolist() if series else []}
+    for attribute in STATISTIC_ATTRIBUTES:
+        reading_columns[attribute] = series.column(attribute) if series else []
+
+    market_data = runtime_data.market_coordinator.data
+    day_slots = market_data.day_slots(day) if market_data else None
+    slots = list(day_slots.items()) if day_slots else []
+
+    def hours_on(relay_on) -> list[int] | None:
+        if all(relay_on(slot) is None for _, slot in slots):
+            return None
+        # the same hours as the relay entities, from the market index
+        return sorted({slot.hour for _, slot in slots if relay_on(slot)})
+
+    return {
+        "date": day.isoformat(),
+        "readings": reading_columns,
+        "prices": {
+            "t": [start for start, _ in slots],
+            "price": [slot.price for _, slot in slots],
+            "distribution_price": [slot.distribution_price for _, slot in slots],
+        },
+        "slot_minutes": day_slots.slot_minutes if day_slots else None,
+        "relay1_hours_on": hours_on(lambda slot: slot.relay1_on),
+        "relay2_hours_on": hours_on(lambda slot: slot.relay2_on),
+    }
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/day_series",
+        vol.Required("gsrn"): cv.string,
+        vol.Optional("start_date"): cv.date,
+        vol.Optional("end_date"): cv.date,
+    }
+)
+@callback
+def websocket_day_series(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+):
+    """Return the cached day series of a metering point, today by default.
+
+    Nothing is fetched from Elenia; days outside the local cache come back
+    with empty arrays.
+    """
+    runtime_data = _runtime_data(hass, msg["gsrn"])
+    if runtime_data is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Metering point not found"
+        )
+        return
+
+    start_date: date = msg.get("start_date") or dt_util.now().date()
+    end_date: date = msg.get("end_date") or start_date
+    if end_date < start_date:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_INVALID_FORMAT,
+            "end_date must not be before start_date",
+        )
+        return
+    if (end_date - start_date).days >= WEBSOCKET_MAX_DAYS:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_INVALID_FORMAT,
+            f"At most {WEBSOCKET_MAX_DAYS} days can be requested at a time",
+        )
+        return
+
+    connection.send_result(
+        msg["id"],
+        {
+            "gsrn": msg["gsrn"],
+            "days": [
+                day_series(runtime_data, start_date + timedelta(days=offset))
+                for offset in range((end_date - start_date).days + 1)
+            ],
+        },
+    )
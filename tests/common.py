@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.elenia.readings import DT_FORMAT
+from custom_components.elenia.types import (
+    MarketIndex,
+    RelayMarketDataList,
+    build_market_index,
+)
+
+
+def slot_end(day: date, slot: int) -> str:
+    """UTC end of the day's n:th 5-minute slot (1-based), as Elenia sends it."""
+    end = dt_util.start_of_local_day(day) + timedelta(minutes=5 * slot)
+    return end.astimezone(timezone.utc).strftime(DT_FORMAT)
+
+
+def measurement(dt: str, a: int, modified: str | None = None, quality: int = 0):
+    return {
+        "dt": dt,
+        "a": a,
+        "a1": a // 3,
+        "a2": a // 3,
+        "a3": a - 2 * (a // 3),
+        "a_": 0,
+        "r": 0,
+        "modified": modified or dt,
+        "quality": quality,
+    }
+
+
+def day_readings(day: date, slots, start_value: int = 0, step: int = 10):
+    """Cumulative readings of the given slots of a day, `step` Wh apart."""
+    return [
+        measurement(slot_end(day, slot), start_value + slot * step) for slot in slots
+    ]
+
+
+def market_day(
+    day: date,
+    prices: list[float],
+    distribution_prices: list[float] | None = None,
+    hours_on: list[int] | None = None,
+    relay: int = 2,
+    status: str = "valid",
+) -> dict:
+    return {
+        "day": day.isoformat(),
+        "gsrn": "643000000000000000",
+        "message_id": f"msg-{day.isoformat()}",
+        "relay": relay,
+        "status": status,
+        "prices": prices,
+        "distribution_prices": distribution_prices or [0.0] * len(prices),
+        "hours_on": hours_on or [],
+    }
+
+
+def market_index(*days: dict) -> MarketIndex:
+    return build_market_index(None, RelayMarketDataList.from_json(list(days)))
+
+
+def local(day: date, hour: int, minute: int = 0) -> datetime:
+    """Wall-clock time of a local day."""
+    return dt_util.start_of_local_day(day) + timedelta(hours=hour, minutes=minute)
@@ -0,0 +1,12 @@
+import pytest
+
+from homeassistant.util import dt as dt_util
+
+
+@pytest.fixture
+def helsinki():
+    """Run in Finnish time, where Elenia's days and DST transitions are."""
+    previous = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Helsinki"))
+    yield
+    dt_util.set_default_time_zone(previous)
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.elenia.coordinator import (
+    ConsumptionCoordinator,
+    MarketCoordinator,
+)
+from custom_components.elenia.gaps import GapTracker
+from custom_components.elenia.readings import ReadingBuffer
+from custom_components.elenia.types import RelayMarketDataList
+
+from .common import day_readings, local, market_day
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+
+
+def market_coordinator(schedule):
+    """The coordinator's state, with the Elenia feeds answering at once."""
+
+    async def fetch_customer_data_and_token():
+        pass
+
+    async def fetch_relay_market(relay):
+        return RelayMarketDataList.from_json([market_day(DAY, [1.0] * 24, relay=relay)])
+
+    async def fetch_relay_schedule():
+        if isinstance(schedule, BaseException):
+            raise schedule
+        return schedule
+
+    elenia_data = SimpleNamespace(
+        fetch_customer_data_and_token=fetch_customer_data_and_token,
+        fetch_relay_market=fetch_relay_market,
+        fetch_relay_schedule=fetch_relay_schedule,
+    )
+    return SimpleNamespace(
+        data=None, _schedule_fetched_at=None, elenia_data=elenia_data
+    )
+
+
+@pytest.mark.parametrize("schedule", [None, TimeoutError()])
+def test_failed_relay_schedule_is_fetched_on_the_next_refresh(schedule):
+    coordinator = market_coordinator(schedule)
+
+    coordinator.data = asyncio.run(MarketCoordinator._fetch_market_data(coordinator))
+
+    assert coordinator.data.relay_schedule_data is None
+    assert coordinator._schedule_fetched_at is None
+    assert MarketCoordinator._should_fetch_schedule(coordinator)
+
+
+def test_refetch_fills_a_gap_after_today_was_merged():
+    first, second, today = (DAY + timedelta(days=offset) for offset in range(3))
+    readings = ReadingBuffer()
+    for day in (first, second):
+        readings.merge(day_readings(day, [s for s in range(1, 289) if s != 100]))
+    readings.merge(day_readings(today, range(1, 13)))
+    gaps = GapTracker()
+    gaps.update(readings, [first, second, today])
+
+    async def fetch_5min_readings(day, conditional=False):
+        if day == first:
+            raise TimeoutError
+        return day_readings(day, range(1, 289))
+
+    coordinator = SimpleNamespace(
+        gaps=gaps,
+        readings=readings,
+        elenia_data=SimpleNamespace(fetch_5min_readings=fetch_5min_readings),
+    )
+    now = local(today, 1)
+
+    changed = asyncio.run(
+        ConsumptionCoordinator._refetch_gaps(coordinator, now, [today])
+    )
+    gaps.update(readings, [second])
+
+    assert len(changed) == 1
+    assert second not in gaps.days
+    assert gaps.attempts[first].count == 1
+    assert gaps.due(now) == []
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.elenia.cost import CostLedger
+from custom_components.elenia.readings import ReadingBuffer
+
+from .common import day_readings, market_day, market_index
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+NEXT_DAY = DAY + timedelta(days=1)
+
+
+def prices(day: date, price: float = 10.0, distribution_price: float = 5.0):
+    return market_day(day, [price] * 24, [distribution_price] * 24)
+
+
+def test_prices_consumption_at_the_total_price():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 13)))
+    ledger = CostLedger()
+
+    assert ledger.update(readings, market_index(prices(DAY))) == [DAY]
+
+    # 11 slots of 10 Wh after the first reading, at 15 c/kWh
+    assert ledger.totals[DAY] == pytest.approx(0.0165)
+
+
+def test_only_new_slots_are_priced():
+    readings = ReadingBuffer()
+    index = market_index(prices(DAY))
+    ledger = CostLedger()
+    readings.merge(day_readings(DAY, range(1, 13)))
+    ledger.update(readings, index)
+
+    readings.merge(day_readings(DAY, range(13, 25)))
+    assert ledger.update(readings, index) == [DAY]
+    assert ledger.update(readings, index) == []
+
+    assert ledger.totals[DAY] == pytest.approx(0.0345)
+
+
+def test_days_without_prices_are_left_unpriced():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 13)))
+    ledger = CostLedger()
+
+    assert ledger.update(readings, market_index(prices(NEXT_DAY))) == []
+    assert DAY not in ledger.totals
+
+
+def test_changed_prices_reprice_the_day():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 13)))
+    ledger = CostLedger()
+    ledger.update(readings, market_index(prices(DAY)))
+
+    assert ledger.update(readings, market_index(prices(DAY, price=25.0))) == [DAY]
+    assert ledger.totals[DAY] == pytest.approx(0.033)
+
+
+def test_start_sum_carries_into_the_next_day():
+    readings = ReadingBuffer()
+    index = market_index(prices(DAY), prices(NEXT_DAY))
+    ledger = CostLedger()
+    readings.merge(day_readings(DAY, range(1, 289)))
+    ledger.update(readings, index)
+
+    readings.merge(day_readings(NEXT_DAY, range(1, 13), start_value=2880))
+    ledger.update(readings, index)
+
+    assert ledger.start_sums[DAY] == 0.0
+    assert ledger.start_sums[NEXT_DAY] == ledger.totals[DAY]
+    assert ledger.hourly_sums(NEXT_DAY)[-1][2] == pytest.approx(
+        ledger.totals[DAY] + ledger.totals[NEXT_DAY]
+    )
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.elenia.const import GAP_REFETCH_INTERVAL
+from custom_components.elenia.gaps import GapTracker, day_gaps
+from custom_components.elenia.readings import ReadingBuffer, to_epoch
+
+from .common import day_readings, local, measurement, slot_end
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+
+
+def test_day_gaps_up_to_the_newest_slot():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, [1, 2, 4, 5, 6]))
+    readings.merge([measurement(slot_end(DAY, 7), 70, quality=1)])
+
+    gaps = day_gaps(readings.days[DAY], DAY, to_epoch(readings.last_dt))
+
+    assert gaps.missing == [to_epoch(slot_end(DAY, 3))]
+    assert gaps.estimated == [to_epoch(slot_end(DAY, 7))]
+
+
+def test_day_gaps_counts_missing_trailing_slots():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 286)))
+    horizon = to_epoch(slot_end(DAY + timedelta(days=1), 1))
+
+    gaps = day_gaps(readings.days[DAY], DAY, horizon)
+
+    assert gaps.missing == [to_epoch(slot_end(DAY, s)) for s in (286, 287, 288)]
+
+
+def test_days_without_readings_are_fully_missing():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 289)))
+    later = DAY + timedelta(days=3)
+    readings.merge(day_readings(later, range(1, 13)))
+    tracker = GapTracker()
+
+    tracker.update(readings, [DAY, later])
+
+    assert sorted(tracker.days) == [DAY + timedelta(days=1), DAY + timedelta(days=2)]
+    assert len(tracker.days[DAY + timedelta(days=1)].missing) == 288
+
+
+def test_due_backs_off_after_each_attempt():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, [1, 3]))
+    tracker = GapTracker()
+    tracker.update(readings, [DAY])
+    now = local(DAY + timedelta(days=1), 12)
+
+    assert tracker.due(now) == [DAY]
+    tracker.record_attempt(DAY, now)
+    assert tracker.due(now + GAP_REFETCH_INTERVAL / 2) == []
+    assert tracker.due(now + GAP_REFETCH_INTERVAL) == [DAY]
+    tracker.record_attempt(DAY, now + GAP_REFETCH_INTERVAL)
+    assert tracker.due(now + GAP_REFETCH_INTERVAL * 2) == []
+    assert tracker.due(now + GAP_REFETCH_INTERVAL * 3) == [DAY]
+
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from custom_components.elenia.hourly import HourlyReadings, iter_months
+
+
+def month(*hours: tuple[str, int | None]) -> dict:
+    return {"hours": [{"dt": dt, "a": a} for dt, a in hours]}
+
+
+def payload(months) -> str:
+    return json.dumps({"year": 2024, "months": months}, indent=2)
+
+
+JANUARY = month(("2024-01-01T01:00:00", 500), ("2024-01-01T02:00:00", 700))
+FEBRUARY = month(("2024-02-01T01:00:00", 300), ("2024-02-01T02:00:00", None))
+
+
+def test_iter_months_from_a_list():
+    assert list(iter_months(payload([JANUARY, FEBRUARY]))) == [
+        (1, JANUARY),
+        (2, FEBRUARY),
+    ]
+
+
+def test_iter_months_from_an_object():
+    body = payload({"2": FEBRUARY, "1": JANUARY})
+
+    assert dict(iter_months(body)) == {1: JANUARY, 2: FEBRUARY}
+
+
+def test_iter_months_rejects_a_missing_comma():
+    with pytest.raises(ValueError):
+        list(iter_months('{"months": [{"hours": []} {"hours": []}]}'))
+
+
+def test_merge_reports_changed_months_only():
+    readings = HourlyReadings()
+
+    assert readings.merge(2024, payload([JANUARY, FEBRUARY])) == [1, 2]
+    assert readings.merge(2024, payload([JANUARY, FEBRUARY])) == []
+    assert readings.month_total(1) == 1.2
+    # null hours are left out
+    assert len(readings.months[2]) == 1
+
+    february = month(("2024-02-01T01:00:00", 300), ("2024-02-01T02:00:00", 400))
+    assert readings.merge(2024, payload([JANUARY, february])) == [2]
+
+
+def test_new_year_carries_the_sum_over():
+    readings = HourlyReadings()
+    readings.merge(2024, payload([JANUARY]))
+    january = month(("2025-01-01T01:00:00", 100))
+
+    assert readings.merge(2025, payload([january])) == [1]
+    assert readings.merge(2024, payload([JANUARY])) == []
+
+    assert readings.year == 2025
+    assert readings.hourly_sums(1)[-1][2] == pytest.approx(1.3)
+
+
+def test_round_trip():
+    readings = HourlyReadings()
+    readings.merge(2024, payload([JANUARY, FEBRUARY]))
+
+    restored = HourlyReadings.from_dict(readings.as_dict())
+
+    assert restored.months == readings.months
+    assert restored.year == 2024
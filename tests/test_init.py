@@ -0,0 +1,193 @@
+import os
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from custom_components.elenia.const import (
+    CONF_CUSTOMER_ID,
+    CONF_FORECAST_SENSORS,
+    CONF_GSRN,
+    CONF_PRICE_SENSOR_FOR_EACH_HOUR,
+    CONF_RATE_LIMIT,
+    CONF_RATE_LIMIT_BURST,
+    CONF_RELAY_SENSOR_FOR_EACH_HOUR,
+    DATA_ACCOUNTS,
+    DOMAIN,
+)
+
+from .common import market_day
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+)
+
+CUSTOMER_ID = "1234567"
+GSRN = "643000000000000001"
+ENTRY_DATA = {
+    CONF_USERNAME: "user@example.com",
+    CONF_PASSWORD: "secret",
+    CONF_CUSTOMER_ID: CUSTOMER_ID,
+    CONF_GSRN: GSRN,
+    CONF_PRICE_SENSOR_FOR_EACH_HOUR: False,
+    CONF_RELAY_SENSOR_FOR_EACH_HOUR: False,
+    CONF_FORECAST_SENSORS: False,
+}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Set up the recorder before hass, as the integration depends on it."""
+    yield
+
+
+class FakeElenia:
+    """Elenia and Cognito on a local server, so real sockets are used."""
+
+    def __init__(self):
+        self.requests = 0
+        self.app = web.Application(middlewares=[self.count])
+        self.app.router.add_post("/cognito", self.cognito)
+        self.app.router.add_get("/customer_data", self.customer_data)
+        self.app.router.add_get("/meter_reading", self.meter_reading)
+        self.app.router.add_get("/relay_control", self.relay_control)
+        self.app.router.add_get("/relay_market", self.relay_market)
+        self.server = TestServer(self.app)
+
+    @web.middleware
+    async def count(self, request, handler):
+        self.requests += 1
+        return await handler(request)
+
+    def urls(self) -> dict:
+        return {
+            "AUTH_URL": str(self.server.make_url("/cognito")),
+            "CUSTOMER_DATA_URL": str(self.server.make_url("/customer_data")),
+            "METER_READING_URL": str(self.server.make_url("/meter_reading")),
+            "RELAY_CONTROL_URL": str(self.server.make_url("/relay_control")),
+            "RELAY_MARKET_URL": str(self.server.make_url("/relay_market")),
+        }
+
+    async def cognito(self, request):
+        return web.json_response(
+            {
+                "AuthenticationResult": {
+                    "AccessToken": "access",
+                    "IdToken": "id",
+                    "RefreshToken": "refresh",
+                    "ExpiresIn": 3600,
+                }
+            }
+        )
+
+    async def customer_data(self, request):
+        return web.json_response(
+            {
+                "token": "customer",
+                "customer_datas": {
+                    CUSTOMER_ID: {
+                        "meteringpoints": [
+                            {"gsrn": GSRN, "device_serialnumber": "1234"}
+                        ]
+                    }
+                },
+            }
+        )
+
+    async def meter_reading(self, request):
+        return web.json_response([])
+
+    async def relay_control(self, request):
+        relay = {
+            "control_type": "dynamic",
+            "subtype": "market",
+            "relayname_user": "Boiler",
+            "number_of_hours": 4,
+        }
+        return web.json_response(
+            {"gsrn": GSRN, "serialnumber": "1234", "relay1": relay, "relay2": None}
+        )
+
+    async def relay_market(self, request):
+        day = market_day(dt_util.now().date(), [5.0] * 24, hours_on=[1, 2])
+        day["relay"] = int(request.query["relay"])
+        return web.json_response([day])
+
+
+@pytest.fixture
+async def elenia(socket_enabled):
+    fake = FakeElenia()
+    await fake.server.start_server()
+    with patch.multiple("custom_components.elenia.elenia_data", **fake.urls()):
+        yield fake
+    await fake.server.close()
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def refresh(hass, entry):
+    runtime = hass.data[DOMAIN][entry.entry_id]
+    await runtime.market_coordinator.async_refresh()
+    await runtime.consumption_coordinator.async_refresh()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs procfs")
+async def test_reload_does_not_leak_connections(hass, elenia):
+    assert await async_setup_component(
+        hass, DOMAIN, {DOMAIN: {CONF_RATE_LIMIT: 100, CONF_RATE_LIMIT_BURST: 100}}
+    )
+    entry = MockConfigEntry(domain=DOMAIN, data=ENTRY_DATA)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    # the pooled connections are opened by the first requests
+    await refresh(hass, entry)
+    fds = open_fds()
+    requests = elenia.requests
+
+    for _ in range(5):
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+        await refresh(hass, entry)
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert elenia.requests > requests
+    assert open_fds() <= fds
+    runtime = hass.data[DOMAIN][entry.entry_id]
+    assert runtime.elenia_data.session is async_get_clientsession(hass)
+    accounts = hass.data[DOMAIN][DATA_ACCOUNTS]
+    assert [account.users for account in accounts.values()] == [1]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert accounts == {}
+
+
+async def test_remove_entry_deletes_its_stores(hass, hass_storage, elenia):
+    entry = MockConfigEntry(domain=DOMAIN, data=ENTRY_DATA)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    keys = [
+        f"{DOMAIN}.{entry.entry_id}{suffix}" for suffix in ("", ".readings", ".cost")
+    ]
+
+    # unloading writes pending delayed saves at once
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert all(key in hass_storage for key in keys)
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert not [key for key in hass_storage if key.startswith(f"{DOMAIN}.")]
@@ -0,0 +1,79 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from custom_components.elenia.optimizer import (
+    PriceSlot,
+    cheapest_slots,
+    cheapest_window,
+    find_cheapest,
+    next_deadline,
+)
+
+from .common import local, market_day, market_index
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+
+
+def hourly(prices: list[float], start: int = 0) -> list[PriceSlot]:
+    return [
+        PriceSlot(start + i * 3600, start + (i + 1) * 3600, price)
+        for i, price in enumerate(prices)
+    ]
+
+
+def test_cheapest_window_by_sliding_sum():
+    slots = hourly([5, 1, 9, 2, 2, 8])
+
+    result = cheapest_window(slots, 2)
+
+    assert [slot.price for slot in result.slots] == [2, 2]
+
+
+def test_cheapest_window_does_not_span_a_gap():
+    slots = hourly([1, 9]) + hourly([1, 9], start=3 * 3600)
+
+    assert cheapest_window(slots, 3) is None
+    assert cheapest_window(slots, 2).start == 0
+
+
+def test_cheapest_slots_prefers_earliest_ties():
+    slots = hourly([3, 1, 2, 1, 2])
+
+    result = cheapest_slots(slots, 3)
+
+    assert [slot.start // 3600 for slot in result.slots] == [1, 2, 3]
+    assert cheapest_slots(slots, 6) is None
+
+
+def test_find_cheapest_stops_at_the_deadline():
+    prices = [10.0] * 24
+    prices[3] = 1.0
+    prices[20] = 0.5
+    index = market_index(market_day(DAY, prices))
+    now = local(DAY, 0)
+
+    result = find_cheapest(
+        index, timedelta(hours=1), deadline=next_deadline(now, time(7)), now=now
+    )
+
+    assert result.start == local(DAY, 3).timestamp()
+    assert result.average_price == 1.0
+
+
+def test_find_cheapest_skips_past_slots():
+    prices = [10.0] * 24
+    prices[3] = 1.0
+    prices[20] = 0.5
+    index = market_index(market_day(DAY, prices))
+
+    result = find_cheapest(index, timedelta(hours=1), now=local(DAY, 5))
+
+    assert result.start == local(DAY, 20).timestamp()
+
+
+def test_next_deadline_rolls_to_tomorrow():
+    assert next_deadline(local(DAY, 8), time(7)) == local(DAY + timedelta(days=1), 7)
+    assert next_deadline(local(DAY, 6), time(7)) == local(DAY, 7)
@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+from custom_components.elenia.readings import ReadingBuffer, local_day_of, to_epoch
+
+from .common import day_readings, measurement, slot_end
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 10, 25)
+
+
+def test_slot_ending_at_midnight_belongs_to_the_day_before():
+    assert local_day_of(slot_end(DAY, 288)) == DAY
+    assert local_day_of(slot_end(DAY, 289)) == date(2024, 10, 26)
+
+
+def test_merge_returns_only_new_slots():
+    readings = ReadingBuffer()
+    assert len(readings.merge(day_readings(DAY, range(1, 13)))) == 12
+    version = readings.version
+
+    changed = readings.merge(day_readings(DAY, range(1, 25)))
+
+    assert [m["dt"] for m in changed] == [slot_end(DAY, s) for s in range(13, 25)]
+    assert readings.merge(day_readings(DAY, range(1, 25))) == []
+    assert readings.version == version + 1
+    assert readings.latest["dt"] == slot_end(DAY, 24)
+
+
+def test_merge_takes_revised_slot():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 4)))
+    revised = measurement(slot_end(DAY, 2), 25, modified="2024-10-26T08:00:00")
+
+    assert readings.merge([revised]) == [revised]
+    assert readings.days[DAY].a[1] == 25
+
+
+def test_merge_skips_null_readings():
+    readings = ReadingBuffer()
+    null = measurement(slot_end(DAY, 1), 0)
+    null["a"] = None
+
+    assert readings.merge([null]) == []
+    assert DAY not in readings.days
+
+
+def test_is_complete_once_the_midnight_slot_is_in():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 288)))
+    assert not readings.is_complete(DAY)
+
+    readings.merge(day_readings(DAY, [288]))
+    assert readings.is_complete(DAY)
+
+
+def test_round_trip():
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 7)))
+
+    restored = ReadingBuffer.from_dict(readings.as_dict())
+
+    assert restored.day(DAY) == readings.day(DAY)
+    assert restored.last_dt == readings.last_dt
+
+
+def test_refetched_earlier_day_merges_after_a_newer_day():
+    """Slots Elenia adds to an older day land whatever today's `modified` is."""
+    readings = ReadingBuffer()
+    yesterday, today = DAY, date(2024, 10, 26)
+    readings.merge(day_readings(yesterday, [*range(1, 100), *range(101, 289)]))
+    readings.merge(
+        [
+            measurement(slot_end(today, s), 3000 + s, modified="2024-10-26T09:10:00")
+            for s in range(1, 100)
+        ]
+    )
+    late = measurement(slot_end(yesterday, 100), 1000, modified="2024-10-26T09:05:00")
+
+    refetch = day_readings(yesterday, range(1, 289))
+    refetch[99] = late
+
+    assert readings.merge(refetch) == [late]
+    assert readings.days[yesterday].index_of(to_epoch(late["dt"])) is not None
+    assert readings.latest["dt"] == slot_end(today, 99)
@@ -0,0 +1,194 @@
+from datetime import date, time, timedelta
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import CONF_NAME, UnitOfEnergy
+from homeassistant.util import dt as dt_util
+
+from custom_components.elenia.const import (
+    CONF_CONTIGUOUS,
+    CONF_CUSTOMER_ID,
+    CONF_DEADLINE,
+    CONF_DURATION,
+    CONF_GSRN,
+)
+from custom_components.elenia.coordinator import (
+    ConsumptionCoordinatorData,
+    HourlyMeterCoordinatorData,
+    MarketCoordinatorData,
+    StateWrites,
+)
+from custom_components.elenia.consumption import ConsumptionDeltas
+from custom_components.elenia.cost import CostLedger
+from custom_components.elenia.hourly import HourlyReadings
+from custom_components.elenia.readings import ReadingBuffer
+from custom_components.elenia.sensor import (
+    CheapestWindowSensor,
+    ConsumptionSensor,
+    CostSensor,
+    HourlyMeterSensor,
+    PriceSensor,
+)
+from custom_components.elenia.types import RelayMarketDataList
+
+from .common import day_readings, local, market_day, market_index
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+ENTRY = SimpleNamespace(data={CONF_CUSTOMER_ID: "1234567", CONF_GSRN: "6430001"})
+ELENIA_DATA = SimpleNamespace(meteringpoint={})
+
+
+def consumption_data() -> ConsumptionCoordinatorData:
+    readings = ReadingBuffer()
+    readings.merge(day_readings(DAY, range(1, 13)))
+    deltas = ConsumptionDeltas()
+    deltas.update(readings, readings.days)
+    costs = CostLedger()
+    costs.update(readings, market_index(market_day(DAY, [10.0] * 24, [5.0] * 24)))
+    return ConsumptionCoordinatorData(
+        readings.version, costs.version, readings, deltas, costs
+    )
+
+
+def coordinator(data):
+    return SimpleNamespace(
+        data=data, last_update_success=True, state_writes=StateWrites()
+    )
+
+
+def test_consumption_sensor_is_a_total_increasing_sensor():
+    sensor = ConsumptionSensor(coordinator(consumption_data()), ENTRY, ELENIA_DATA, "a")
+    sensor._update_attrs()
+
+    assert isinstance(sensor, SensorEntity)
+    assert sensor.state == 0.12
+    assert sensor.state_class is SensorStateClass.TOTAL_INCREASING
+    assert sensor.unit_of_measurement == UnitOfEnergy.KILO_WATT_HOUR
+
+
+@pytest.mark.parametrize(
+    ("period", "reset"), [("today", DAY), ("month", DAY.replace(day=1))]
+)
+def test_cost_sensor_resets_with_its_period(period, reset):
+    sensor = CostSensor(coordinator(consumption_data()), ENTRY, ELENIA_DATA, period)
+    with patch.object(dt_util, "now", return_value=local(DAY, 12)):
+        sensor._update_attrs()
+
+    assert sensor.state == 0.02
+    assert sensor.state_class is SensorStateClass.TOTAL
+    assert sensor.state_attributes == {
+        "last_reset": dt_util.start_of_local_day(reset).isoformat()
+    }
+
+
+def test_price_sensor_is_a_sensor():
+    market_data = MarketCoordinatorData(
+        None,
+        None,
+        RelayMarketDataList.from_json([market_day(DAY, [float(h) for h in range(24)])]),
+    )
+    sensor = PriceSensor(coordinator(market_data), ENTRY, ELENIA_DATA, "prices")
+    with patch.object(dt_util, "now", return_value=local(DAY, 7, 30)):
+        sensor._update_attrs()
+
+    assert isinstance(sensor, SensorEntity)
+    assert sensor.state == 7.0
+    assert sensor.unit_of_measurement == "cent"
+
+
+def hourly_meter_data() -> HourlyMeterCoordinatorData:
+    readings = HourlyReadings()
+    hours = [
+        {"dt": f"2024-10-{day:02}T10:00:00", "a": 1500} for day in range(1, 32)
+    ]
+    readings.merge(2024, json.dumps({"months": {"10": {"hours": hours}}}))
+    return HourlyMeterCoordinatorData(readings.version, readings)
+
+
+def test_hourly_meter_month_sensor_is_a_total_with_last_reset():
+    sensor = HourlyMeterSensor(
+        coordinator(hourly_meter_data()), ENTRY, ELENIA_DATA, "month"
+    )
+    with patch.object(dt_util, "now", return_value=local(date(2024, 10, 31), 23)):
+        sensor._update_attrs()
+
+    assert isinstance(sensor, SensorEntity)
+    assert sensor.state == 46.5
+    assert sensor.state_class is SensorStateClass.TOTAL
+    assert sensor.state_attributes == {
+        "last_reset": dt_util.start_of_local_day(date(2024, 10, 1)).isoformat()
+    }
+
+    # the new month starts at midnight, before its readings arrive
+    midnight = local(date(2024, 11, 1), 0)
+    with patch.object(dt_util, "now", return_value=midnight), patch.object(
+        sensor, "async_write_ha_state"
+    ) as write_state:
+        sensor._handle_midnight(midnight)
+    write_state.assert_called_once()
+    assert sensor.state is None
+    assert sensor.state_attributes == {
+        "last_reset": dt_util.start_of_local_day(date(2024, 11, 1)).isoformat()
+    }
+
+
+def test_hourly_meter_last_hour_sensor_is_a_measurement():
+    sensor = HourlyMeterSensor(
+        coordinator(hourly_meter_data()), ENTRY, ELENIA_DATA, "last_hour"
+    )
+    sensor._update_attrs()
+
+    assert sensor.state == 1.5
+    assert sensor.state_class is SensorStateClass.MEASUREMENT
+    assert sensor.state_attributes is None
+
+
+def cheapest_window_sensor(prices):
+    """A 2 hour dishwasher window before 07:00 on DAY."""
+    market_data = MarketCoordinatorData(
+        None, None, RelayMarketDataList.from_json([market_day(DAY, prices)])
+    )
+    window = {
+        CONF_NAME: "Dishwasher",
+        CONF_DURATION: timedelta(hours=2),
+        CONF_CONTIGUOUS: True,
+        CONF_DEADLINE: time(7),
+    }
+    return CheapestWindowSensor(coordinator(market_data), ENTRY, ELENIA_DATA, window)
+
+
+def is_on(sensor, hour, minute=0):
+    with patch.object(dt_util, "now", return_value=local(DAY, hour, minute)):
+        sensor._update_attrs()
+    return sensor.is_on
+
+
+def test_cheapest_window_runs_once_before_its_deadline():
+    prices = [10.0] * 24
+    prices[2:7] = [1.0, 1.0, 2.0, 2.0, 2.0]
+    sensor = cheapest_window_sensor(prices)
+
+    states = [is_on(sensor, *at) for at in [(1,), (2, 30), (4,), (5, 15), (6,)]]
+    assert states == [False, True, False, False, False]
+    # the next period's window, within today's remaining prices
+    assert is_on(sensor, 7) is True
+    assert sensor.extra_state_attributes["start"] == local(DAY, 7).isoformat()
+
+
+def test_cheapest_window_is_searched_again_when_prices_change():
+    prices = [10.0] * 24
+    prices[2:4] = [1.0, 1.0]
+    sensor = cheapest_window_sensor(prices)
+    assert [is_on(sensor, 2, 30), is_on(sensor, 4)] == [True, False]
+
+    prices = prices[:5] + [0.5, 0.5] + prices[7:]
+    sensor.coordinator.data = MarketCoordinatorData(
+        None, None, RelayMarketDataList.from_json([market_day(DAY, prices)])
+    )
+    assert is_on(sensor, 5, 15) is True
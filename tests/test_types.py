@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from custom_components.elenia.types import _slot_starts
+
+from .common import local, market_day, market_index
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+DAY = date(2024, 11, 5)
+# 25 hours, clocks go back at 04:00
+FALL_BACK = date(2024, 10, 27)
+# 23 hours, clocks go forward at 03:00
+SPRING_FORWARD = date(2024, 3, 31)
+
+
+@pytest.mark.parametrize(
+    ("day", "count", "slot_seconds"),
+    [
+        (DAY, 24, 3600),
+        (DAY, 96, 900),
+        (FALL_BACK, 25, 3600),
+        (FALL_BACK, 100, 900),
+        (SPRING_FORWARD, 23, 3600),
+        (SPRING_FORWARD, 92, 900),
+    ],
+)
+def test_slot_starts_fit_the_day(day, count, slot_seconds):
+    day_start, seconds, starts = _slot_starts(day, count)
+
+    assert seconds == slot_seconds
+    assert day_start == local(day, 0).timestamp()
+    assert starts == [day_start + i * slot_seconds for i in range(count)]
+
+
+def test_24_prices_on_a_25_hour_day_follow_the_wall_clock():
+    _, seconds, starts = _slot_starts(FALL_BACK, 24)
+
+    assert seconds == 3600
+    assert len(starts) == 24
+    # the repeated 03:00 hour gets the first of its two slots
+    assert starts[4] - starts[3] == 2 * 3600
+
+
+def test_24_prices_on_a_23_hour_day_skip_the_missing_hour():
+    _, _, starts = _slot_starts(SPRING_FORWARD, 24)
+
+    assert starts[3] is None
+    assert len([start for start in starts if start is not None]) == 23
+
+
+@pytest.mark.parametrize(
+    ("day", "count"), [(DAY, 100), (FALL_BACK, 96), (SPRING_FORWARD, 96)]
+)
+def test_slot_starts_rejects_counts_that_do_not_fit(day, count):
+    with pytest.raises(ValueError):
+        _slot_starts(day, count)
+
+
+def test_market_index_finds_slots_by_time():
+    prices = [float(hour) for hour in range(24)]
+    day_slots = market_index(market_day(DAY, prices, hours_on=[2, 3]))[
+        DAY.isoformat()
+    ]
+
+    slot = day_slots.at(local(DAY, 2, 30).timestamp())
+    assert slot.price == 2.0
+    assert slot.relay2_on is True
+    assert day_slots.at(local(DAY, 4).timestamp()).relay2_on is False
+    assert day_slots.at_hour(23).price == 23.0
+
+
+def test_at_hour_averages_the_quarters_of_the_hour():
+    prices = [float(quarter) for quarter in range(96)]
+    day_slots = market_index(
+        market_day(DAY, prices, distribution_prices=[1.0] * 96, hours_on=[2])
+    )[DAY.isoformat()]
+
+    slot = day_slots.at_hour(2)
+    assert slot.price == 9.5
+    assert slot.distribution_price == 1.0
+    assert slot.total == 10.5
+    assert slot.relay2_on is True
+    assert slot.hour == 2
+    # the quarters themselves are still found by time
+    assert day_slots.at(local(DAY, 2, 45).timestamp()).price == 11.0
+
+
+def test_at_hour_takes_the_first_of_the_repeated_hour():
+    prices = [float(quarter) for quarter in range(100)]
+    day_slots = market_index(market_day(FALL_BACK, prices))[FALL_BACK.isoformat()]
+
+    assert day_slots.at_hour(3).price == 13.5
+    assert day_slots.at_hour(4).price == 21.5  # the 25-hour day's sixth hour
@@ -0,0 +1,39 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.elenia.coordinator import MarketCoordinatorData
+from custom_components.elenia.readings import ReadingBuffer
+from custom_components.elenia.types import RelayMarketDataList
+from custom_components.elenia.websocket_api import day_series
+
+from .common import local, market_day
+
+pytestmark = pytest.mark.usefixtures("helsinki")
+
+# 25 hours, clocks go back at 04:00
+FALL_BACK = date(2024, 10, 27)
+
+
+def runtime_data(*days: dict):
+    market_data = MarketCoordinatorData(
+        None, None, RelayMarketDataList.from_json(list(days))
+    )
+    return SimpleNamespace(
+        consumption_coordinator=SimpleNamespace(readings=ReadingBuffer()),
+        market_coordinator=SimpleNamespace(data=market_data),
+    )
+
+
+def test_hours_on_match_the_relay_entities_on_a_25_hour_day():
+    data = runtime_data(market_day(FALL_BACK, [1.0] * 24, hours_on=[5, 6]))
+    day_slots = data.market_coordinator.data.day_slots(FALL_BACK)
+
+    series = day_series(data, FALL_BACK)
+
+    on = [start for start, slot in day_slots.items() if slot.relay2_on]
+    assert on == [local(FALL_BACK, 5).timestamp(), local(FALL_BACK, 6).timestamp()]
+    assert series["relay2_hours_on"] == [5, 6]
+    assert series["relay1_hours_on"] is None
+    assert len(series["prices"]["t"]) == 24